@@ -0,0 +1,71 @@
+"""
+Per-step cost of random self-play for 2, 3 and 4 players.
+
+Compares the vectorized AzulEnv.action_masks against the original
+per-action Python loop (kept here as `loop_masks`), checks both agree on
+every visited position, and reports mask and full-step (mask + step) cost.
+
+    python benchmarks/bench_action_masks.py --steps 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.rl_env import AzulEnv
+
+
+def loop_masks(env):
+    """The pre-vectorization implementation, one Python iteration per action."""
+    game = env.game
+    mask = np.zeros(env.action_space.n, dtype=bool)
+    player = game.players[game.current_player_idx]
+    for action_idx in range(env.action_space.n):
+        game_source, color_id, game_dest = env.to_game_action(action_idx)
+        if game_source == -1:
+            valid_source = game.center[color_id] > 0
+        else:
+            valid_source = game.factories[game_source, color_id] > 0
+        if not valid_source:
+            continue
+        mask[action_idx] = game_dest == -1 or player.can_add_to_pattern_line(game_dest, color_id)
+    return mask
+
+
+def bench(num_players, steps, seed):
+    env = AzulEnv(num_players=num_players)
+    rng = np.random.default_rng(seed)
+    env.reset(seed=seed)
+    t_vec = t_loop = t_step = 0.0
+    for _ in range(steps):
+        start = time.perf_counter()
+        mask = env.action_masks()
+        t_vec += time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = loop_masks(env)
+        t_loop += time.perf_counter() - start
+        assert np.array_equal(mask, reference), "vectorized mask disagrees with loop"
+
+        start = time.perf_counter()
+        _, _, terminated, truncated, _ = env.step(int(rng.choice(np.flatnonzero(mask))))
+        t_step += time.perf_counter() - start
+        if terminated or truncated:
+            env.reset()
+    return env.action_space.n, t_vec / steps * 1e6, t_loop / steps * 1e6, (t_vec + t_step) / steps * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'players':>8}{'actions':>9}{'mask (vec)':>13}{'mask (loop)':>13}{'speedup':>9}{'step total':>13}")
+    for n in (2, 3, 4):
+        actions, vec_us, loop_us, step_us = bench(n, args.steps, args.seed)
+        print(f"{n:>8}{actions:>9}{vec_us:>11.1f}us{loop_us:>11.1f}us{loop_us / vec_us:>8.1f}x{step_us:>11.1f}us")
@@ -0,0 +1,88 @@
+"""
+Single-game stepping cost of the NumPy engine versus the Numba kernels.
+
+Both backends play the same seeded random-legal games (moves are picked
+from the mask with a shared uniform stream, so trajectories are identical
+and checked to be). Reported per move:
+
+    engine   AzulGame.step (+ end-of-game check and bonuses)
+    mask     an uncached env action mask
+    virtual  every player's get_complete_virtual_score (dense rewards)
+    env      AzulCoreEnv.step (engine + observation + reward)
+
+    python benchmarks/bench_engine_backends.py --games 200
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.core_env import AzulCoreEnv
+from src.azul.backends import resolve_backend
+
+
+def play(backend, num_players, games, seed):
+    env = AzulCoreEnv(num_players=num_players, backend=backend)
+    rng = np.random.default_rng(seed)
+    t = dict(engine=0.0, mask=0.0, virtual=0.0, env=0.0)
+    moves, finals = 0, []
+    for g in range(games):
+        env.reset(seed=seed + g)
+        probe = AzulCoreEnv(num_players=num_players, backend=backend)
+        probe.reset(seed=seed + g)
+        game = probe.game
+        while True:
+            start = time.perf_counter()
+            mask = env._compute_masks(game)
+            t["mask"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            [p.get_complete_virtual_score() for p in game.players]
+            t["virtual"] += time.perf_counter() - start
+
+            legal = np.flatnonzero(mask)
+            action = int(legal[int(rng.random() * len(legal))])
+
+            start = time.perf_counter()
+            game.step(env.to_game_action(action))
+            over = game.is_game_over()
+            if over:
+                game.apply_end_game_bonuses()
+            t["engine"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            env.step(action)
+            t["env"] += time.perf_counter() - start
+
+            moves += 1
+            # Random play can stall (no full row, tiles never run out); stop
+            # where the env truncates
+            if over or game.round_number > env.max_rounds:
+                break
+        finals.append([p.score for p in game.players])
+    return {k: v / moves * 1e6 for k, v in t.items()}, finals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if resolve_backend("jit") != "jit":
+        sys.exit("Numba is not installed; only the NumPy engine is available.")
+
+    play("jit", args.players, 2, args.seed)  # compile (or load cached) kernels
+    base, base_finals = play("numpy", args.players, args.games, args.seed)
+    fast, fast_finals = play("jit", args.players, args.games, args.seed)
+    assert base_finals == fast_finals, "backends diverged"
+
+    print(f"{args.games} games, {args.players} players (identical final scores on both backends)")
+    print(f"{'per move':<10}{'numpy':>10}{'jit':>10}{'speedup':>9}")
+    for key in ("engine", "mask", "virtual", "env"):
+        print(f"{key:<10}{base[key]:>8.1f}us{fast[key]:>8.1f}us{base[key] / fast[key]:>8.1f}x")
@@ -0,0 +1,118 @@
+"""
+Cold import time of each entry point, and which heavy frameworks it pulls in.
+
+Every module is imported in a fresh interpreter (so nothing is cached in
+sys.modules) and the import alone is timed, excluding interpreter startup.
+The last sections break a fresh worker's start into interpreter, NumPy,
+src.azul and env imports (wall time of `python -c`, startup included), then
+time a worker pool coming up and building one env per worker: spawned
+(every worker pays all of the above) versus forked from a forkserver that
+preloads the NumPy-only env. The first forkserver pool includes starting
+the server; later pools of the same parent only pay the forks.
+
+    python benchmarks/bench_import_time.py --repeats 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+ENTRY_POINTS = [
+    "src.agent.core_env",
+    "src.agent.rl_env",
+    "play_cli",
+    "play_vs_ai",
+    "play_server",
+    "src.analytics",
+    "src.fuzz_engine",
+    "src.build_start_pool",
+    "src.agent.evaluation",
+    "src.train_coop_dense",
+]
+HEAVY = ["gymnasium", "torch", "stable_baselines3", "sb3_contrib", "numba"]
+
+PROBE = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))
+"""
+
+
+def time_import(module, repeats):
+    times = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(root=ROOT, module=module, heavy=HEAVY)],
+                             capture_output=True, text=True, check=True, cwd=ROOT)
+        elapsed, loaded = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(elapsed)
+    return float(np.median(times)), loaded
+
+
+def _build_env(module):
+    from src.agent.core_env import AzulCoreEnv
+    __import__(module)
+    AzulCoreEnv(num_players=2)
+
+
+def _heavy_loaded(_):
+    return [m for m in HEAVY if m in sys.modules]
+
+
+def time_process_start(statement, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {ROOT!r}); {statement}"],
+                       check=True, cwd=ROOT)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def time_pool(method, module, workers):
+    ctx = get_context(method)
+    if method == "forkserver":
+        # The server imports these once, when it starts; every worker is a fork of it
+        ctx.set_forkserver_preload([__name__, module])
+    start = time.perf_counter()
+    with ctx.Pool(workers, initializer=_build_env, initargs=(module,)) as pool:
+        loaded = pool.map(_heavy_loaded, range(workers), chunksize=1)
+    return time.perf_counter() - start, sorted(set(sum(loaded, [])))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'entry point':<26}{'import (median)':>17}  heavy frameworks loaded")
+    for module in ENTRY_POINTS:
+        try:
+            seconds, loaded = time_import(module, args.repeats)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<26}{'failed':>17}  {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{module:<26}{seconds * 1000:>15.0f}ms  {', '.join(loaded) or '-'}")
+
+    print("\nFresh process start (median wall time, interpreter startup included):")
+    for statement in ("pass", "import numpy", "import src.azul.game",
+                      "import src.agent.core_env", "import src.agent.rl_env"):
+        print(f"  {statement:<30}{time_process_start(statement, args.repeats) * 1000:>6.0f}ms")
+
+    print(f"\nPool of {args.workers} workers, each importing the env and building one:")
+    runs = [("spawn", "src.agent.core_env"), ("spawn", "src.agent.rl_env"),
+            ("forkserver", "src.agent.core_env"), ("forkserver", "src.agent.core_env")]
+    for method, module in runs:
+        seconds, loaded = time_pool(method, module, args.workers)
+        print(f"  {method:<11}{module:<24}{seconds * 1000:>8.0f}ms  {', '.join(loaded) or '-'}")
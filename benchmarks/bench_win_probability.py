@@ -0,0 +1,73 @@
+"""
+Speed and agreement of the Monte Carlo win-probability estimator.
+
+For positions taken from a seeded random-legal game, times
+estimate_win_probability with the compiled playout kernel and, on fewer
+playouts, with the NumPy engine, and prints both estimates with their
+confidence intervals (they should overlap).
+
+    python benchmarks/bench_win_probability.py --playouts 4000 --rollout random
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.core_env import AzulCoreEnv
+from src.agent.montecarlo import estimate_win_probability
+from src.azul.backends import resolve_backend
+
+
+def positions(num_players, plies, seed):
+    env = AzulCoreEnv(num_players=num_players, backend="numpy")
+    env.reset(seed=seed)
+    rng = np.random.default_rng(seed)
+    taken = []
+    for ply in range(max(plies) + 1):
+        if ply in plies:
+            taken.append((ply, env.game.clone()))
+        _, _, terminated, truncated, _ = env.step(int(rng.choice(np.flatnonzero(env.action_masks()))))
+        if terminated or truncated:
+            break
+    return taken
+
+
+def timed(game, **kwargs):
+    start = time.perf_counter()
+    result = estimate_win_probability(game, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def fmt(r):
+    lo, hi = r["win_prob_ci"]
+    m_lo, m_hi = r["margin_ci"]
+    return f"{r['win_prob']:6.1%} [{lo:.1%}, {hi:.1%}]  margin {r['margin']:+6.2f} [{m_lo:+.2f}, {m_hi:+.2f}]"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playouts", type=int, default=4000)
+    parser.add_argument("--engine-playouts", type=int, default=200)
+    parser.add_argument("--rollout", choices=("random", "greedy"), default="random")
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--plies", type=int, nargs="+", default=[0, 20, 40])
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the engine runs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if resolve_backend("jit") != "jit":
+        sys.exit("Numba is not installed; only the engine estimator is available.")
+
+    estimate_win_probability(positions(args.players, [0], args.seed)[0][1], 10, args.rollout)  # compile
+    for ply, game in positions(args.players, args.plies, args.seed):
+        fast, fast_t = timed(game, num_playouts=args.playouts, rollout=args.rollout, backend="jit")
+        slow, slow_t = timed(game, num_playouts=args.engine_playouts, rollout=args.rollout,
+                             backend="numpy", workers=args.workers)
+        print(f"ply {ply:>2}, round {game.round_number}, player {game.current_player_idx} to move")
+        print(f"  kernel {args.playouts:>6} playouts {fast_t:6.2f}s ({args.playouts / fast_t:>7.0f}/s)  {fmt(fast)}")
+        print(f"  engine {args.engine_playouts:>6} playouts {slow_t:6.2f}s "
+              f"({args.engine_playouts / slow_t:>7.0f}/s)  {fmt(slow)}")
@@ -0,0 +1,71 @@
+"""
+Load generator for play_server.py.
+
+Opens `--clients` concurrent connections, each playing `--games` games of
+random legal moves, and reports the round-trip latency of MOVE commands
+(human move + AI reply, including batching delay).
+
+    python play_server.py --model <zip> &
+    python benchmarks/load_server.py --clients 200 --games 2
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+
+async def send(reader, writer, line):
+    writer.write((line + "\n").encode())
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    if not reply["ok"]:
+        raise RuntimeError(reply["error"])
+    return reply
+
+
+async def client(host, port, games, seed, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(games):
+            state = await send(reader, writer, "NEW")
+            session = state["session"]
+            while not state["terminated"]:
+                s, c, d = rng.choice(state["legal_moves"])
+                start = time.perf_counter()
+                state = await send(reader, writer, f"MOVE {session} {s} {c} {d}")
+                latencies.append(time.perf_counter() - start)
+            await send(reader, writer, f"QUIT {session}")
+    finally:
+        writer.close()
+
+
+async def run(host, port, clients, games, seed):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, games, seed + i, latencies) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    stats = await send(reader, writer, "STATS")
+    writer.close()
+
+    ms = np.array(latencies) * 1000
+    print(f"Clients: {clients} | Games: {clients * games} | Moves: {len(ms)} | Wall: {elapsed:.1f}s")
+    print(f"Throughput: {len(ms) / elapsed:.0f} moves/s")
+    print(f"Latency p50: {np.percentile(ms, 50):.1f}ms | p99: {np.percentile(ms, 99):.1f}ms | max: {ms.max():.1f}ms")
+    print(f"Server mean batch size: {stats['mean_batch_size']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.clients, args.games, args.seed))
@@ -1,9 +1,9 @@
-from src.agent.rl_env import AzulEnv
+from src.agent.core_env import AzulCoreEnv
 from src.azul.constants import PLAYABLE_COLORS, ID_TO_COLOR
 
 def play_manual():
     # render_mode='human' enables the print statements
-    env = AzulEnv(num_players=2, render_mode="human")
+    env = AzulCoreEnv(num_players=2, render_mode="human")
     obs, _ = env.reset()
     
     print("Welcome to Azul CLI!")
@@ -16,16 +16,18 @@ def play_manual():
         # Input Loop
         try:
             print("\nMake a Move:")
-            source = int(input("  Source (0-4 Factories, 5 Center): "))
+            n_fact = env.game.num_factories
+            source = int(input(f"  Source (0-{n_fact - 1} Factories, {n_fact} Center): "))
             
             print("  Colors: 0=Blue, 1=Yellow, 2=Red, 3=Black, 4=White")
             color_idx = int(input("  Color Index (0-4): "))
             
             dest = int(input("  Dest Row (0-4, 5 for Floor): "))
             
-            # Encode Action
-            # Formula: (Source * 30) + (Color_Index * 6) + Destination
-            action = (source * 30) + (color_idx * 6) + dest
+            # Encode Action: (source * NUM_COLORS + color_idx) * NUM_DESTS + dest
+            action = env.encode_action(source, color_idx, dest)
+            if not 0 <= action < env.num_actions:
+                raise ValueError
             
             # Step Environment
             obs, reward, terminated, truncated, info = env.step(action)
@@ -35,7 +37,7 @@ def play_manual():
             else:
                 print(f"\n>>> Move Accepted. Reward: {reward}")
                 
-            if terminated:
+            if terminated or truncated:
                 print("\nGAME OVER!")
                 env.render()
                 running = False
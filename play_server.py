@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import itertools
+import json
+
+from src.agent.core_env import AzulCoreEnv, NUM_COLORS, NUM_DESTS
+from src.agent.inference import BatchedPolicy
+
+# --- CONFIG ---
+MODEL_PATH = "models/ppo_azul_big_1M/azul_1M_final.zip"
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_SESSIONS = 1000
+HUMAN_PLAYER = 0
+
+# Line protocol (one command per line, one JSON object back per command):
+#   NEW                  -> start a game, AI moves first if it holds the start
+#   MOVE <id> <s> <c> <d> -> play a human move, then the AI replies
+#   STATE <id>           -> current position
+#   QUIT <id>            -> drop the session
+#   STATS                -> server / batching statistics
+# MOVE and QUIT only accept sessions this connection created. Failed commands
+# answer {"ok": false, "error": ...} and leave the connection open.
+
+
+class GameSession:
+    def __init__(self, session_id, policy):
+        self.session_id = session_id
+        self.policy = policy
+        self.env = AzulCoreEnv(num_players=2)
+        self.obs, _ = self.env.reset()
+        self.terminated = False
+        # Games past the env's round cap stop here instead of running on
+        self.truncated = False
+        self.last_ai_moves = []
+        # One command at a time per game, even if a client pipelines
+        self.lock = asyncio.Lock()
+
+    @property
+    def finished(self):
+        return self.terminated or self.truncated
+
+    async def play_ai_turns(self):
+        self.last_ai_moves = []
+        game = self.env.game
+        while not self.finished and game.current_player_idx != HUMAN_PLAYER:
+            action = await self.policy.predict(self.obs, self.env.action_masks())
+            self.obs, _, self.terminated, self.truncated, _ = self.env.step(action)
+            self.last_ai_moves.append([int(x) for x in self.env.decode_action(action)])
+
+    async def play_human(self, s, c, d):
+        in_range = 0 <= s < self.env.num_sources and 0 <= c < NUM_COLORS and 0 <= d < NUM_DESTS
+        action = self.env.encode_action(s, c, d)
+        if not in_range or not self.env.action_masks()[action]:
+            raise ValueError("Illegal move")
+        self.obs, _, self.terminated, self.truncated, _ = self.env.step(action)
+        await self.play_ai_turns()
+
+    def state(self):
+        game = self.env.game
+        mask = self.env.action_masks()
+        legal = [] if self.finished else [
+            [int(x) for x in self.env.decode_action(a)] for a in mask.nonzero()[0]
+        ]
+        return {
+            "session": self.session_id,
+            "round": game.round_number,
+            "current_player": game.current_player_idx,
+            "scores": [int(p.score) for p in game.players],
+            "factories": game.factories[:, 1:].tolist(),
+            "center": game.center[1:].tolist(),
+            "first_player_token": game.first_player_token_available,
+            "ai_moves": self.last_ai_moves,
+            "legal_moves": legal,
+            "terminated": bool(self.terminated),
+            "truncated": bool(self.truncated),
+        }
+
+
+class GameServer:
+    def __init__(self, policy, max_sessions=MAX_SESSIONS):
+        self.policy = policy
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+    async def _new(self, owned):
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError("Server full")
+        session = GameSession(next(self._ids), self.policy)
+        self.sessions[session.session_id] = session
+        owned.add(session.session_id)
+        async with session.lock:
+            await session.play_ai_turns()
+            return session.state()
+
+    def _get(self, arg):
+        session = self.sessions.get(int(arg))
+        if session is None:
+            raise ValueError(f"Unknown session {arg}")
+        return session
+
+    def _get_owned(self, arg, owned):
+        """Sessions can only be played or closed by the connection that created them."""
+        session = self._get(arg)
+        if session.session_id not in owned:
+            raise ValueError(f"Session {arg} belongs to another connection")
+        return session
+
+    async def dispatch(self, line, owned):
+        parts = line.split()
+        if not parts:
+            raise ValueError("Empty command")
+        cmd, args = parts[0].upper(), parts[1:]
+
+        if cmd == "NEW":
+            return await self._new(owned)
+        if cmd == "MOVE" and len(args) == 4:
+            session = self._get_owned(args[0], owned)
+            s, c, d = map(int, args[1:])
+            async with session.lock:
+                if session.finished:
+                    raise ValueError("Game is over")
+                await session.play_human(s, c, d)
+                return session.state()
+        if cmd == "STATE" and len(args) == 1:
+            return self._get(args[0]).state()
+        if cmd == "QUIT" and len(args) == 1:
+            session = self._get_owned(args[0], owned)
+            self.sessions.pop(session.session_id, None)
+            owned.discard(session.session_id)
+            return {"closed": session.session_id}
+        if cmd == "STATS":
+            return {
+                "sessions": len(self.sessions),
+                "batches": self.policy.batches,
+                "requests": self.policy.requests,
+                "mean_batch_size": round(self.policy.mean_batch_size, 2),
+            }
+        raise ValueError(f"Bad command: {line.strip()}")
+
+    async def handle_client(self, reader, writer):
+        owned = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = {"ok": True, **await self.dispatch(line.decode(), owned)}
+                except ValueError as e:
+                    reply = {"ok": False, "error": str(e)}
+                except Exception as e:
+                    # An engine or inference failure only fails this command
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            # Sessions die with the connection that created them
+            for session_id in owned:
+                self.sessions.pop(session_id, None)
+            writer.close()
+
+
+async def serve(model_path, host, port, max_batch, max_delay_ms):
+    from sb3_contrib import MaskablePPO
+
+    print(f"Loading Brain from: {model_path}...")
+    model = MaskablePPO.load(model_path, device="cpu")
+    policy = BatchedPolicy(model, max_batch=max_batch, max_delay_ms=max_delay_ms)
+    policy.start()
+
+    server = GameServer(policy)
+    tcp_server = await asyncio.start_server(server.handle_client, host, port)
+    print(f"Serving Azul on {host}:{port} (batch<={max_batch}, deadline {max_delay_ms}ms)")
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        await policy.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent human-vs-AI Azul server")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.model, args.host, args.port, args.max_batch, args.max_delay_ms))
+    except KeyboardInterrupt:
+        print("\nShutting down...")
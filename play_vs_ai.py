@@ -2,13 +2,17 @@ import sys
 import os
 import time
 import numpy as np
-from sb3_contrib import MaskablePPO
-from src.agent.rl_env import AzulEnv
+from src.agent.core_env import AzulCoreEnv
+from src.agent.eval_cache import CachedPolicy, EvaluationCache, model_fingerprint
+from src.agent.analysis import analyze_position, format_move
 from src.azul.constants import ID_TO_COLOR
 
 # CHANGE THIS TO YOUR MODEL PATH
 MODEL_PATH = "models/ppo_azul_big_1M/azul_1M_final.zip"
 LOG_FILE = "game_debug_log.txt"
+HINT_MOVES = 5
+# Evaluations of seen positions (openings especially) persist between games
+CACHE_PATH = "models/eval_cache.npz"
 
 def log(msg, to_file=True):
     """Prints to console AND writes to file."""
@@ -17,6 +21,14 @@ def log(msg, to_file=True):
         with open(LOG_FILE, "a", encoding="utf-8") as f:
             f.write(msg + "\n")
 
+def format_score_event(event):
+    if event["type"] == "row":
+        color = ID_TO_COLOR[event["color"]]
+        return f"Row {event['row']}: {color} to column {event['col']}, Points: {event['points']}"
+    if event["type"] == "floor":
+        return f"Floor Penalty: {event['penalty']}"
+    return f"End Game Bonus: {event['points']}"
+
 def print_board(env):
     game = env.game
     log("\n" + "="*60)
@@ -55,7 +67,20 @@ def print_board(env):
         floor_tiles = [ID_TO_COLOR[t] for t in p.floor_line if t != 0]
         log(f"    Floor Line: [{', '.join(floor_tiles)}] (Penalty: {p.floor_line_count})")
 
+def log_analysis(model, env, top_n, cache=None):
+    analysis = analyze_position(model, env)
+    if cache is not None:
+        # The root was just evaluated: a CachedPolicy move here needs no second pass
+        cache.put(env.game.state_key(), analysis["probs"], analysis["value"])
+    log(f"  Position value: {analysis['value']:+.2f}")
+    for m in analysis["moves"][:top_n]:
+        log(f"  {format_move(env, m['action']):<16} p={m['prob']:.2f}  "
+            f"value={m['value_after']:+.2f}  score Δ={m['score_delta']:+d}")
+
 def play():
+    # SB3/torch only load once a game with the AI actually starts
+    from sb3_contrib import MaskablePPO
+
     # Reset Log File
     with open(LOG_FILE, "w", encoding="utf-8") as f:
         f.write("--- AZUL GAME LOG ---\n")
@@ -67,11 +92,18 @@ def play():
         log("❌ Model file not found!")
         return
 
-    env = AzulEnv(num_players=2) 
+    fingerprint = model_fingerprint(model)
+    cache = EvaluationCache()
+    warm = cache.load(CACHE_PATH, fingerprint)
+    if warm: log(f"Loaded {warm} cached positions from {CACHE_PATH}")
+    policy = CachedPolicy(model, cache)
+
+    env = AzulCoreEnv(num_players=2) 
     obs, _ = env.reset()
     
-    # Enable verbose logging in the game engine
-    env.game.round_logs = {}
+    # Collect the engine's scoring events for the round reports
+    score_events = []
+    env.game.subscribe(score_events.append)
     
     running = True
     while running:
@@ -87,27 +119,32 @@ def play():
             valid = False
             while not valid:
                 try:
-                    user_input = input("\nEnter Move (Source Color Dest): ").strip().split()
+                    user_input = input("\nEnter Move (Source Color Dest) or 'hint': ").strip().split()
                     
                     # Log what the user typed so we can debug input errors too
                     with open(LOG_FILE, "a", encoding="utf-8") as f:
                         f.write(f"USER INPUT: {user_input}\n")
                         
+                    if user_input == ["hint"]:
+                        log_analysis(model, env, HINT_MOVES)
+                        continue
                     if len(user_input) != 3: continue
                     s, c, d = map(int, user_input)
-                    action = (s * 30) + (c * 6) + d
+                    action = env.encode_action(s, c, d)
                     mask = env.action_masks()
                     if not mask[action]: 
                         log("❌ ILLEGAL MOVE!")
                         continue
-                    obs, reward, terminated, _, _ = env.step(action)
+                    obs, reward, terminated, truncated, _ = env.step(action)
                     valid = True
                 except ValueError: pass
         else:
             log("\n>>> 🤖 AI TURN (Player 1) <<<")
+            # Show the candidates the AI is weighing up
+            log_analysis(model, env, 3, cache)
             # Deterministic=True makes the AI play its best move
-            action, _ = model.predict(obs, action_masks=env.action_masks(), deterministic=True)
-            obs, reward, terminated, _, _ = env.step(action)
+            action = policy.predict(env, deterministic=True)
+            obs, reward, terminated, truncated, _ = env.step(action)
             s, c, d = env.decode_action(action)
             c_str = list(ID_TO_COLOR.values())[c+1] 
             log(f"🤖 AI plays: S{s} C{c_str} -> D{d}")
@@ -124,18 +161,19 @@ def play():
             for p_idx in [0, 1]:
                 name = "YOU" if p_idx == 0 else "AI "
                 log(f"\nPlayer {name} Score Actions:")
-                if p_idx in env.game.round_logs:
-                    for log_msg in env.game.round_logs[p_idx]:
-                        log(f"  > {log_msg}")
-                else:
+                events = [e for e in score_events if e["player"] == p_idx]
+                for event in events:
+                    log(f"  > {format_score_event(event)}")
+                if not events:
                     log("  (No tiles scored)")
                 log(f"  New Total Score: {env.game.players[p_idx].score}")
+            score_events.clear()
 
             input("\nPress Enter to continue (Check logs now if you want)...")
 
         # --- GAME OVER ---
-        if terminated:
-            log("\nGAME OVER")
+        if terminated or truncated:
+            log("\nGAME OVER" if terminated else f"\nGAME STOPPED after {env.max_rounds} rounds")
             p0 = env.game.players[0].score
             p1 = env.game.players[1].score
             log(f"Final Score: YOU {p0} - AI {p1}")
@@ -146,5 +184,9 @@ def play():
             
             running = False
 
+    cache.save(CACHE_PATH, fingerprint)
+    stats = cache.stats()
+    log(f"Eval cache: {stats['hits']} hits / {stats['misses']} misses, {stats['entries']} positions saved")
+
 if __name__ == "__main__":
     play()
\ No newline at end of file
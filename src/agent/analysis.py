@@ -0,0 +1,112 @@
+import numpy as np
+
+from src.azul.constants import ID_TO_COLOR, PLAYABLE_COLORS
+from src.agent.eval_cache import policy_forward
+
+# Rows per forward pass when annotating many positions at once
+MAX_BATCH_ROWS = 4096
+
+
+def format_move(env, action):
+    s, c, d = env.decode_action(action)
+    return f"S{s} C{ID_TO_COLOR[PLAYABLE_COLORS[c]]} -> D{d}"
+
+
+def _expand(env, game, rng):
+    """
+    Builds the root observation plus one observation per legal successor.
+    Score deltas are for the player to move, using the fully simulated
+    (end of round + end of game) virtual score.
+
+    Successors are cloned onto fresh RNG streams drawn from `rng`: a move
+    that ends the round deals the next one, and the real game's stream
+    would show the analysis the actual upcoming deal.
+    """
+    mask = env.action_masks(game)
+    legal = np.flatnonzero(mask)
+    mover = game.current_player_idx
+    before = game.players[mover].get_complete_virtual_score()
+
+    obs = [env._get_obs(game)]
+    deltas = []
+    for action in legal:
+        child = game.clone(seed=int(rng.integers(2**63)))
+        child.step(env.to_game_action(action))
+        obs.append(env._get_obs(child))
+        deltas.append(child.players[mover].get_complete_virtual_score() - before)
+    return mask, legal, obs, deltas
+
+
+def analyze_positions(model, env, games, seed=None):
+    """
+    Ranks every legal move in each of `games` with one batched forward pass
+    over all roots and successors (split only above MAX_BATCH_ROWS).
+
+    Returns one dict per game:
+        {"value": root value, "probs": masked root action probabilities,
+         "moves": [{"action", "move", "prob", "value_after",
+         "score_delta"}, ...]}  # moves sorted by prob
+    `value_after` is the network's value of the successor, i.e. from the
+    viewpoint of whoever moves next in that position. Successors that start
+    a new round get a deal drawn from `seed`, not the game's own bag.
+    """
+    rng = np.random.default_rng(seed)
+    expanded = [_expand(env, game, rng) for game in games]
+
+    obs, masks = [], []
+    for mask, legal, child_obs, _ in expanded:
+        obs.extend(child_obs)
+        masks.append(mask)
+        # Only the root's probabilities are used; successors just need a valid mask
+        masks.extend([np.ones_like(mask)] * len(legal))
+    obs = np.stack(obs)
+    masks = np.stack(masks)
+
+    probs, values = [], []
+    for start in range(0, len(obs), MAX_BATCH_ROWS):
+        p, v = policy_forward(model, obs[start:start + MAX_BATCH_ROWS], masks[start:start + MAX_BATCH_ROWS])
+        probs.append(p)
+        values.append(v)
+    probs = np.concatenate(probs)
+    values = np.concatenate(values)
+
+    results = []
+    row = 0
+    for _, legal, _, deltas in expanded:
+        root_probs = probs[row]
+        child_values = values[row + 1:row + 1 + len(legal)]
+        moves = [{
+            "action": int(a),
+            "move": tuple(int(x) for x in env.decode_action(a)),
+            "prob": float(root_probs[a]),
+            "value_after": float(v),
+            "score_delta": int(delta),
+        } for a, v, delta in zip(legal, child_values, deltas)]
+        moves.sort(key=lambda m: m["prob"], reverse=True)
+        results.append({"value": float(values[row]), "probs": root_probs, "moves": moves})
+        row += 1 + len(legal)
+    return results
+
+
+def analyze_position(model, env):
+    """Ranked legal moves for the env's current position."""
+    return analyze_positions(model, env, [env.game])[0]
+
+
+def annotate_game(model, env, actions, seed=None):
+    """
+    Replays `actions` from `env.reset(seed=seed)` and analyses every ply in
+    bulk. Each entry also records the move actually played and its rank.
+    """
+    env.reset(seed=seed)
+    games = []
+    for action in actions:
+        games.append(env.game.clone())
+        env.step(action)
+
+    annotated = analyze_positions(model, env, games, seed=seed)
+    for entry, action in zip(annotated, actions):
+        ranked = [m["action"] for m in entry["moves"]]
+        entry["played"] = int(action)
+        entry["rank"] = ranked.index(int(action)) + 1 if int(action) in ranked else None
+    return annotated
@@ -0,0 +1,313 @@
+import copy
+import json
+import os
+import pickle
+import queue
+import random
+import threading
+
+import numpy as np
+import torch as th
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.save_util import save_to_zip_file
+
+MANIFEST_NAME = "checkpoints.json"
+MONITOR_FIELDS = ("rewards", "needs_reset", "episode_returns", "episode_lengths",
+                  "episode_times", "total_steps")
+
+
+def _clone_tensors(obj):
+    """Deep-copies a (nested) state_dict so later optimizer steps can't touch it."""
+    if isinstance(obj, th.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _clone_tensors(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_clone_tensors(v) for v in obj)
+    return copy.deepcopy(obj)
+
+
+def _find_monitor(env):
+    while env is not None:
+        if isinstance(env, Monitor):
+            return env
+        env = getattr(env, "env", None)
+    return None
+
+
+def capture_rng_state():
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": th.get_rng_state(),
+    }
+    if th.cuda.is_available():
+        state["torch_cuda"] = th.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    th.set_rng_state(state["torch"])
+    if "torch_cuda" in state and th.cuda.is_available():
+        th.cuda.set_rng_state_all(state["torch_cuda"])
+
+
+def capture_env_state(vec_env):
+    """
+    Snapshots every sub-environment of a DummyVecEnv: the game (including
+    its bag RNG), the gym np_random and the Monitor's running episode stats.
+    """
+    states = []
+    for env in getattr(vec_env, "envs", []):
+        monitor = _find_monitor(env)
+        states.append({
+            "game": copy.deepcopy(env.unwrapped.game),
+            "np_random": copy.deepcopy(env.unwrapped.np_random),
+            "monitor": {f: copy.deepcopy(getattr(monitor, f)) for f in MONITOR_FIELDS} if monitor else None,
+        })
+    return states
+
+
+def restore_env_state(vec_env, states):
+    envs = getattr(vec_env, "envs", [])
+    if len(envs) != len(states):
+        raise ValueError(f"Checkpoint has {len(states)} envs, got {len(envs)}")
+    for env, state in zip(envs, states):
+        env.unwrapped.game = state["game"]
+        env.unwrapped.np_random = state["np_random"]
+        monitor = _find_monitor(env)
+        if monitor is not None and state["monitor"] is not None:
+            for f, v in state["monitor"].items():
+                setattr(monitor, f, v)
+
+
+def snapshot_model(model):
+    """
+    Mirrors BaseAlgorithm.save() but only copies data, so the (slow) zip
+    serialization can happen off the training thread.
+    """
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    for torch_var in state_dicts_names + torch_variable_names:
+        exclude.add(torch_var.split(".")[0])
+    for param_name in exclude:
+        data.pop(param_name, None)
+    data = copy.deepcopy(data)
+
+    pytorch_variables = None
+    if torch_variable_names:
+        pytorch_variables = {}
+        for name in torch_variable_names:
+            attr = model
+            for part in name.split("."):
+                attr = getattr(attr, part)
+            pytorch_variables[name] = _clone_tensors(attr)
+
+    params = _clone_tensors(model.get_parameters())
+    return data, params, pytorch_variables
+
+
+class CheckpointManager(BaseCallback):
+    """
+    Drop-in replacement for CheckpointCallback.
+
+    - The model is copied on the training thread (cheap) and written to disk
+      by a background thread, so rollouts never wait on zip compression.
+    - Saves happen at the first rollout boundary after every `save_freq`
+      steps, where model, buffers and envs are mutually consistent.
+    - Alongside each `<prefix>_<steps>_steps.zip` a `_state.pkl` file stores
+      the RNG states and environment states needed for an exact resume.
+    - Only the last `keep_last` checkpoints plus the `keep_best` highest
+      scoring ones are kept on disk.
+
+    Scores default to the mean Monitor episode reward at save time; external
+    evaluators can report better ones with `record_score()`, and `pin()` a
+    checkpoint so retention leaves it alone until they are done with it.
+    """
+
+    def __init__(self, save_freq, save_path, name_prefix="rl_model",
+                 keep_last=3, keep_best=3, score_fn=None, verbose=0):
+        super().__init__(verbose)
+        self.save_freq = save_freq
+        self.save_path = save_path
+        self.name_prefix = name_prefix
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.score_fn = score_fn
+        self.on_saved = []  # Called from the writer thread with (path, num_timesteps)
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._pending = False
+        self._pinned = {}  # path -> pin count
+        self._entries = self._load_manifest()
+
+    # --- BOOKKEEPING ---
+    def _manifest_path(self):
+        return os.path.join(self.save_path, MANIFEST_NAME)
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path(), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _write_manifest(self):
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp, self._manifest_path())
+
+    def checkpoint_path(self, num_timesteps):
+        return os.path.join(self.save_path, f"{self.name_prefix}_{num_timesteps}_steps.zip")
+
+    def record_score(self, path, score):
+        """Attach an evaluation score to a checkpoint and re-apply retention."""
+        with self._lock:
+            for entry in self._entries:
+                if entry["path"] == path:
+                    entry["score"] = float(score)
+            self._apply_retention()
+
+    def pin(self, path):
+        with self._lock:
+            self._pinned[path] = self._pinned.get(path, 0) + 1
+
+    def unpin(self, path):
+        with self._lock:
+            self._pinned[path] -= 1
+            if self._pinned[path] <= 0:
+                del self._pinned[path]
+            self._apply_retention()
+
+    def _apply_retention(self):
+        by_age = sorted(self._entries, key=lambda e: e["steps"])
+        keep = {e["path"] for e in by_age[-self.keep_last:]} if self.keep_last > 0 else set()
+        scored = [e for e in self._entries if e.get("score") is not None]
+        scored.sort(key=lambda e: e["score"], reverse=True)
+        keep.update(e["path"] for e in scored[:self.keep_best])
+        keep.update(self._pinned)
+
+        for entry in self._entries:
+            if entry["path"] in keep:
+                continue
+            for f in (entry["path"], state_path_for(entry["path"])):
+                if os.path.exists(f):
+                    os.remove(f)
+            if self.verbose >= 1:
+                print(f"Removed checkpoint {entry['path']}")
+        self._entries = [e for e in self._entries if e["path"] in keep]
+        self._write_manifest()
+
+    # --- BACKGROUND WRITER ---
+    def _writer_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            try:
+                self._write(*job)
+            except Exception as e:
+                # A failed save must not kill the thread: wait() would block forever
+                print(f"Checkpoint {job[0]} failed: {type(e).__name__}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path, num_timesteps, score, data, params, pytorch_variables, extra_state):
+        save_to_zip_file(path, data=data, params=params, pytorch_variables=pytorch_variables)
+        tmp = state_path_for(path) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(extra_state, f)
+        os.replace(tmp, state_path_for(path))
+
+        with self._lock:
+            self._entries = [e for e in self._entries if e["path"] != path]
+            self._entries.append({"path": path, "steps": num_timesteps, "score": score})
+            self._apply_retention()
+        if self.verbose >= 1:
+            print(f"Saved checkpoint {path}")
+        for hook in self.on_saved:
+            try:
+                hook(path, num_timesteps)
+            except Exception as e:
+                print(f"on_saved hook failed for {path}: {type(e).__name__}: {e}")
+
+    # --- CALLBACK API ---
+    def _init_callback(self):
+        os.makedirs(self.save_path, exist_ok=True)
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer.start()
+
+    def _default_score(self):
+        buffer = self.model.ep_info_buffer
+        if not buffer:
+            return None
+        return float(np.mean([ep["r"] for ep in buffer]))
+
+    def _on_step(self):
+        # Defer to the next rollout boundary: mid-rollout the model's
+        # `_last_obs` lags the envs and the rollout buffer is half full.
+        if self.n_calls % self.save_freq == 0:
+            self._pending = True
+        return True
+
+    def _on_rollout_start(self):
+        if self._pending:
+            self._pending = False
+            self.save_now()
+
+    def save_now(self):
+        score = self.score_fn(self.model) if self.score_fn else self._default_score()
+        data, params, pytorch_variables = snapshot_model(self.model)
+        extra_state = {
+            "num_timesteps": self.model.num_timesteps,
+            "rng": capture_rng_state(),
+            "envs": capture_env_state(self.model.get_env()),
+        }
+        path = self.checkpoint_path(self.model.num_timesteps)
+        self._queue.put((path, self.model.num_timesteps, score, data, params, pytorch_variables, extra_state))
+        return path
+
+    def _on_training_end(self):
+        if self._pending:
+            self._pending = False
+            self.save_now()
+        self.wait()
+
+    def wait(self):
+        """Blocks until every queued checkpoint has been written."""
+        self._queue.join()
+
+
+def state_path_for(model_path):
+    base = model_path[:-4] if model_path.endswith(".zip") else model_path
+    return base + "_state.pkl"
+
+
+def load_checkpoint(algo_cls, path, env, **kwargs):
+    """
+    Loads a model and, when a matching `_state.pkl` exists, restores RNG and
+    environment state so training continues exactly where it stopped.
+    Pass `reset_num_timesteps=False` to `learn()` afterwards.
+    """
+    state_path = state_path_for(path)
+    has_state = os.path.exists(state_path)
+    # Keep the saved `_last_obs` so the restored envs continue mid-episode
+    kwargs.setdefault("force_reset", not has_state)
+    model = algo_cls.load(path, env=env, **kwargs)
+    if has_state:
+        with open(state_path, "rb") as f:
+            extra_state = pickle.load(f)
+        restore_env_state(model.get_env(), extra_state["envs"])
+        restore_rng_state(extra_state["rng"])
+    else:
+        print(f"No resume state at {state_path}; restoring weights and optimizer only.")
+    return model
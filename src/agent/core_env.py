@@ -0,0 +1,241 @@
+import numpy as np
+
+from src.azul.backends import game_class, resolve_backend
+from src.azul.constants import GRID_SIZE, PLAYABLE_COLORS
+
+# Action = (source, color, destination), flattened source-major.
+# Sources are the factories followed by the center; destinations are the
+# pattern lines followed by the floor.
+NUM_COLORS = len(PLAYABLE_COLORS)
+NUM_DESTS = GRID_SIZE + 1
+FLOOR_DEST = GRID_SIZE
+# Episodes are truncated once a game goes past this many rounds. Real games
+# last 5-8, but weak play can leave tiles nobody can place, which then cycle
+# through the floor and the box without the game ever ending.
+MAX_ROUNDS = 30
+
+def build_action_tables(num_factories):
+    """Decode tables for every action index, generated from the factory count."""
+    num_sources = num_factories + 1
+    idx = np.arange(num_sources * NUM_COLORS * NUM_DESTS)
+    dest = idx % NUM_DESTS
+    color = (idx // NUM_DESTS) % NUM_COLORS
+    source = idx // (NUM_DESTS * NUM_COLORS)
+    game_actions = [
+        (-1 if s == num_factories else int(s), PLAYABLE_COLORS[c], -1 if d == FLOOR_DEST else int(d))
+        for s, c, d in zip(source, color, dest)
+    ]
+    return source, color, dest, game_actions
+
+class AzulCoreEnv:
+    """
+    The Azul environment with the Gymnasium reset/step API but no Gymnasium
+    import. Simulation-only code (self-play, analytics, fuzzing, hotseat
+    play) uses this directly; `rl_env.AzulEnv` adds the spaces for training.
+
+    `backend` picks the engine: "numpy", "jit" or "auto" (jit when Numba is
+    installed). Left unset it is `backends.DEFAULT_BACKEND`, which is NumPy
+    unless AZUL_BACKEND says otherwise; the training scripts pass "auto".
+    Both engines play identical games for a given seed.
+    Games still running after `max_rounds` rounds end as truncated.
+    """
+    metadata = {"render_modes": ["human", "ansi"], "render_fps": 4}
+
+    def __init__(self, num_players=2, render_mode=None, start_pool=None, start_pool_prob=0.0,
+                 backend=None, max_rounds=MAX_ROUNDS):
+        self.num_players = num_players
+        self.max_rounds = max_rounds
+        self.render_mode = render_mode
+        # Optional StartPositionPool: a fraction of resets begin mid-game
+        self.start_pool = start_pool
+        self.start_pool_prob = start_pool_prob
+        self._np_random = None
+        self.backend = resolve_backend(backend)
+        self.game = game_class(self.backend)(num_players)
+        self._kernels = None
+        if self.backend == "jit":
+            from src.azul import kernels
+            self._kernels = kernels
+        self.num_sources = self.game.num_factories + 1
+        (self.action_source, self.action_color,
+         self.action_dest, self._game_actions) = build_action_tables(self.game.num_factories)
+        self.num_actions = len(self._game_actions)
+        board_size = GRID_SIZE * GRID_SIZE + 2 * GRID_SIZE + len(self.game.players[0].floor_line)
+        self._obs_size = (self.num_sources * self.game.factories.shape[1]
+                          + num_players * (board_size + 1) + 1)
+        # Derived views of self.game (mask, obs, virtual scores), valid
+        # while the game object and its version are unchanged
+        self._cache_game = None
+        self._cache_version = None
+        self._cache = {}
+
+    @property
+    def np_random(self):
+        """Env-level RNG (same stream as gymnasium's for a given seed)."""
+        if self._np_random is None:
+            self._np_random = np.random.default_rng()
+        return self._np_random
+
+    @np_random.setter
+    def np_random(self, value):
+        self._np_random = value
+
+    def reset(self, seed=None, options=None):
+        """
+        options:
+            start_state: a round-start snapshot to begin from
+            start_pool:  a StartPositionPool to sample the snapshot from
+        """
+        if seed is not None:
+            self._np_random = np.random.default_rng(seed)
+        self.game.reset(seed=seed)
+
+        options = options or {}
+        state = options.get("start_state")
+        pool = options.get("start_pool")
+        if state is None and pool is None and self.start_pool is not None:
+            if self.np_random.random() < self.start_pool_prob:
+                pool = self.start_pool
+        if state is None and pool is not None:
+            state = pool.sample(self.np_random)
+        if state is not None:
+            self.game.restore_round_start(state)
+        return self._get_obs(), {}
+
+    def _state_cache(self):
+        """Memo dict for the current state of self.game; emptied on any change."""
+        if self._cache_game is not self.game or self._cache_version != self.game.version:
+            self._cache_game = self.game
+            self._cache_version = self.game.version
+            self._cache = {}
+        return self._cache
+
+    def step(self, action_idx):
+        game = self.game
+        cache = self._cache
+        if (self._kernels is not None and self._cache_game is game
+                and self._cache_version == game.version and "obs" in cache
+                and not game.is_game_over()):
+            # A move that leaves tiles on the table changes neither the
+            # scores nor the game-over state, so one kernel call applies it
+            # and patches the observation, and the score total carries over
+            if "score_total" not in cache:
+                cache["score_total"] = sum([p.score for p in game.players])
+            prev_total = cache["score_total"]
+            try:
+                obs = game.step_observed(self._game_actions[action_idx], cache["obs"])
+            except ValueError:
+                return self._get_obs(), -100, True, False, {"valid": False}
+            if obs is not None:
+                self._cache_version = game.version
+                self._cache = {"obs": obs, "score_total": prev_total}
+                return obs, -0.1, False, game.round_number > self.max_rounds, {"valid": True}
+            return self._finish_step(prev_total)
+
+        prev_total = sum([p.score for p in game.players])
+        try:
+            game.step(self.to_game_action(action_idx))
+        except ValueError:
+            return self._get_obs(), -100, True, False, {"valid": False}
+        return self._finish_step(prev_total)
+
+    def _finish_step(self, prev_total):
+        terminated = self.game.is_game_over()
+        truncated = not terminated and self.game.round_number > self.max_rounds
+
+        if terminated:
+            self.game.apply_end_game_bonuses()
+
+        total_delta = sum([p.score for p in self.game.players]) - prev_total
+
+        reward = total_delta
+        reward -= 0.1
+
+        return self._get_obs(), reward, terminated, truncated, {"valid": True}
+
+    def action_masks(self, game=None):
+        """
+        Legal actions as a flat bool array: (source has the color) AND
+        (color fits the destination row), combined as an outer product.
+        Cached per state for self.game; don't modify the returned array.
+        """
+        if game is None or game is self.game:
+            cache = self._state_cache()
+            if "mask" not in cache:
+                cache["mask"] = self._compute_masks(self.game)
+            return cache["mask"]
+        return self._compute_masks(game)
+
+    def _compute_masks(self, game):
+        player = game.players[game.current_player_idx]
+        if self._kernels is not None:
+            out = np.empty(self.num_actions, dtype=bool)
+            self._kernels.action_mask(game.factories, game.center, player.wall,
+                                player.pattern_lines_color, player.pattern_lines_count, out)
+            return out
+
+        available = np.empty((self.num_sources, NUM_COLORS), dtype=bool)
+        available[:-1] = game.factories[:, 1:NUM_COLORS + 1] > 0
+        available[-1] = game.center[1:NUM_COLORS + 1] > 0
+
+        placeable = np.ones((NUM_COLORS, NUM_DESTS), dtype=bool)
+        placeable[:, :GRID_SIZE] = player.placeable_mask().T
+
+        return (available[:, :, None] & placeable[None, :, :]).ravel()
+
+    def _get_obs(self, game=None):
+        """Observation vector, cached per state like action_masks."""
+        if game is None or game is self.game:
+            cache = self._state_cache()
+            if "obs" not in cache:
+                cache["obs"] = self._compute_obs(self.game)
+            return cache["obs"]
+        return self._compute_obs(game)
+
+    def _compute_obs(self, game):
+        if self._kernels is not None:
+            return self._compute_obs_jit(game)
+        state = game.get_global_state()
+        obs = np.concatenate([
+            state['factories'].flatten(),
+            state['center'].flatten(),
+            np.concatenate([p for p in state['players']]),
+            np.eye(self.num_players)[state['current_player']],
+            [state['first_player_token']]
+        ])
+        return obs.astype(np.float32)
+
+    def _compute_obs_jit(self, game):
+        # Same layout as above, written straight into a float32 array. A new
+        # array per state: callers keep observations (rollouts, analysis)
+        k = self._kernels
+        obs = np.empty(self._obs_size, dtype=np.float32)
+        offset = k.observation_frame(game.factories, game.center, game.current_player_idx,
+                                     self.num_players, int(game.first_player_token_available), obs)
+        for p in game.players:
+            offset = k.board_observation(p.cells, obs, offset)
+        return obs
+
+    def virtual_scores(self):
+        """Each player's get_complete_virtual_score() for the current state, cached."""
+        cache = self._state_cache()
+        if "virtual_scores" not in cache:
+            cache["virtual_scores"] = [p.get_complete_virtual_score() for p in self.game.players]
+        return cache["virtual_scores"]
+
+    def decode_action(self, action_idx):
+        return self.action_source[action_idx], self.action_color[action_idx], self.action_dest[action_idx]
+
+    def encode_action(self, source, color_idx, dest):
+        """Inverse of decode_action. `source == num_factories` is the center."""
+        return (source * NUM_COLORS + color_idx) * NUM_DESTS + dest
+
+    def to_game_action(self, action_idx):
+        """Maps an action index to the (source, color_id, row) tuple AzulGame.step expects."""
+        return self._game_actions[action_idx]
+
+    def render(self):
+        pass # Not used by play_vs_ai (uses custom print)
+
+    def close(self):
+        pass
@@ -0,0 +1,157 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+KEY_BYTES = 16
+# Rough per-entry cost of the OrderedDict slot, key object and tuple
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def model_fingerprint(model):
+    """Hash of the policy weights, so a disk cache never outlives its model."""
+    h = hashlib.blake2b(digest_size=16)
+    for name, tensor in model.policy.state_dict().items():
+        h.update(name.encode())
+        h.update(tensor.detach().cpu().numpy().tobytes())
+    return h.hexdigest()
+
+
+def policy_forward(model, obs, masks):
+    """
+    One pass through a MaskablePPO policy for a batch of observations.
+    Returns (masked action probabilities, values) as numpy arrays.
+    """
+    import torch as th
+
+    policy = model.policy
+    obs_tensor, _ = policy.obs_to_tensor(obs)
+    with th.no_grad():
+        features = policy.extract_features(obs_tensor)
+        if policy.share_features_extractor:
+            latent_pi, latent_vf = policy.mlp_extractor(features)
+        else:
+            pi_features, vf_features = features
+            latent_pi = policy.mlp_extractor.forward_actor(pi_features)
+            latent_vf = policy.mlp_extractor.forward_critic(vf_features)
+        values = policy.value_net(latent_vf)
+        distribution = policy._get_action_dist_from_latent(latent_pi)
+        distribution.apply_masking(masks)
+        probs = distribution.distribution.probs
+    return probs.cpu().numpy(), values.cpu().numpy().reshape(-1)
+
+
+class EvaluationCache:
+    """
+    LRU map from `AzulGame.state_key()` to (masked action probs, value).
+    Bounded by an approximate memory budget rather than an entry count.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(probs):
+        return probs.nbytes + KEY_BYTES + 8 + ENTRY_OVERHEAD_BYTES
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, probs, value):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        probs = np.asarray(probs, dtype=np.float32)
+        self._entries[key] = (probs, float(value))
+        self._bytes += self._entry_size(probs)
+        while self._bytes > self.max_bytes and self._entries:
+            _, (old_probs, _) = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(old_probs)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # --- PERSISTENCE ---
+    def save(self, path, fingerprint=""):
+        """Writes entries oldest-to-newest so a reload keeps the LRU order."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if self._entries:
+            keys = np.frombuffer(b"".join(self._entries.keys()), dtype=np.uint8).reshape(-1, KEY_BYTES)
+            probs = np.stack([e[0] for e in self._entries.values()])
+            values = np.array([e[1] for e in self._entries.values()], dtype=np.float32)
+        else:
+            keys = np.zeros((0, KEY_BYTES), dtype=np.uint8)
+            probs = np.zeros((0, 0), dtype=np.float32)
+            values = np.zeros(0, dtype=np.float32)
+        np.savez_compressed(path, keys=keys, probs=probs, values=values, fingerprint=fingerprint)
+
+    def load(self, path, fingerprint=""):
+        """Warms the cache from disk. Returns the number of entries loaded."""
+        if not os.path.exists(path):
+            return 0
+        with np.load(path) as data:
+            if str(data["fingerprint"]) != fingerprint:
+                print(f"Ignoring evaluation cache {path}: it was built for a different model.")
+                return 0
+            for key, probs, value in zip(data["keys"], data["probs"], data["values"]):
+                self.put(key.tobytes(), probs, value)
+        return len(self._entries)
+
+
+class CachedPolicy:
+    """
+    Evaluates AzulEnv positions with a MaskablePPO, consulting the cache first.
+    Deterministic `predict` matches `model.predict(..., deterministic=True)`.
+    """
+
+    def __init__(self, model, cache=None):
+        self.model = model
+        self.cache = cache if cache is not None else EvaluationCache()
+
+    def evaluate(self, env):
+        """Returns (masked action probabilities, value) for the env's position."""
+        key = env.game.state_key()
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry
+        obs = env._get_obs()
+        mask = env.action_masks()
+        probs, values = policy_forward(self.model, obs[None], mask[None])
+        entry = (probs[0], float(values[0]))
+        self.cache.put(key, *entry)
+        return entry
+
+    def predict(self, env, deterministic=True):
+        probs, _ = self.evaluate(env)
+        if deterministic:
+            return int(np.argmax(probs))
+        p = probs.astype(np.float64)
+        return int(np.random.choice(len(p), p=p / p.sum()))
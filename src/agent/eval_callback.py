@@ -0,0 +1,147 @@
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from stable_baselines3.common.callbacks import BaseCallback
+
+from src.agent.evaluation import evaluate_checkpoint
+
+
+def _worker_init():
+    # Evaluation workers must not compete with the learner for every core
+    os.environ["OMP_NUM_THREADS"] = "1"
+    import torch
+    torch.set_num_threads(1)
+
+
+class BackgroundEvaluator(BaseCallback):
+    """
+    Evaluates every checkpoint a CheckpointManager writes, in a pool of
+    spawned processes, so PPO never waits on games.
+
+    - Each checkpoint plays `num_games` seeded games (the same seeds every
+      time, so checkpoints face identical bags) against `baselines` and the
+      `num_previous` checkpoints saved before it.
+    - Finished evaluations are logged at a rollout end, one per rollout, as
+      eval/vs_<opponent>/{win_rate,margin} and eval/checkpoint_steps, where
+      earlier checkpoints appear as prev1, prev2, ...
+    - The win rate against `score_opponent` is passed to
+      `CheckpointManager.record_score`, so retention keeps the strongest.
+
+    Pass it after the manager: `callback=[checkpoints, evaluator]`.
+    """
+
+    def __init__(self, checkpoints, baselines=("random", "greedy"), num_previous=2,
+                 num_games=100, workers=2, seed=0, score_opponent="greedy",
+                 max_pending=4, wait_at_end=True, verbose=0):
+        super().__init__(verbose)
+        self.checkpoints = checkpoints
+        self.baselines = list(baselines)
+        self.num_previous = num_previous
+        self.num_games = num_games
+        self.workers = workers
+        self.seed = seed
+        self.score_opponent = score_opponent
+        self.max_pending = max_pending
+        self.wait_at_end = wait_at_end
+
+        self._lock = threading.Lock()
+        self._results = queue.Queue()
+        self._history = []   # Checkpoint paths in save order
+        self._pending = 0
+        self._executor = None
+
+        checkpoints.on_saved.append(self._submit)
+        if score_opponent is not None and checkpoints.score_fn is None:
+            # Episode rewards and win rates aren't comparable: leave
+            # checkpoints unscored until their evaluation comes back
+            checkpoints.score_fn = lambda model: None
+
+    def _init_callback(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=get_context("spawn"),
+                                                 initializer=_worker_init)
+
+    def _submit(self, path, num_timesteps):
+        """
+        CheckpointManager.on_saved hook; runs on the checkpoint writer thread,
+        so it logs failures instead of raising.
+        """
+        with self._lock:
+            previous = self._history[-self.num_previous:] if self.num_previous > 0 else []
+            self._history.append(path)
+            executor = self._executor
+            if executor is None:
+                print(f"Evaluator is not running; skipping {path}")
+                return
+            if self._pending >= self.max_pending:
+                if self.verbose >= 1:
+                    print(f"Evaluation backlog full; skipping {path}")
+                return
+            self._pending += 1
+        # Kept on disk until its score is recorded; earlier checkpoints that
+        # retention has already removed are skipped by the worker
+        self.checkpoints.pin(path)
+        opponents = self.baselines + previous
+        try:
+            future = executor.submit(evaluate_checkpoint, path, opponents, self.num_games, self.seed)
+        except Exception as e:
+            # Shut down or broken (a worker died): the checkpoint must not stay pinned
+            print(f"Could not submit evaluation of {path}: {type(e).__name__}: {e}")
+            with self._lock:
+                self._pending -= 1
+            self.checkpoints.unpin(path)
+            return
+        future.add_done_callback(lambda f: self._results.put((path, num_timesteps, previous, f)))
+
+    def _log_next(self):
+        """Logs one finished evaluation, if any. Returns its checkpoint steps or None."""
+        try:
+            path, num_timesteps, previous, future = self._results.get_nowait()
+        except queue.Empty:
+            return None
+        with self._lock:
+            self._pending -= 1
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"Evaluation of {path} failed: {type(e).__name__}: {e}")
+            self.checkpoints.unpin(path)
+            return None
+
+        names = {p: f"prev{len(previous) - i}" for i, p in enumerate(previous)}
+        self.logger.record("eval/checkpoint_steps", num_timesteps)
+        for spec, match in results.items():
+            name = names.get(spec, spec)
+            self.logger.record(f"eval/vs_{name}/win_rate", match["win_rate"])
+            self.logger.record(f"eval/vs_{name}/margin", match["margin"])
+        if self.score_opponent in results:
+            self.checkpoints.record_score(path, results[self.score_opponent]["win_rate"])
+        self.checkpoints.unpin(path)
+        if self.verbose >= 1:
+            summary = ", ".join(f"{names.get(s, s)} {m['win_rate']:.0%} ({m['margin']:+.1f})"
+                                for s, m in results.items())
+            print(f"Eval @ {num_timesteps} steps: {summary}")
+        return num_timesteps
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        # Values recorded here go out with PPO's own dump right after;
+        # one evaluation per rollout so none overwrite each other
+        self._log_next()
+
+    def _on_training_end(self):
+        if self._executor is None:
+            return
+        with self._lock:
+            executor, self._executor = self._executor, None
+        executor.shutdown(wait=self.wait_at_end, cancel_futures=not self.wait_at_end)
+        while True:
+            num_timesteps = self._log_next()
+            if num_timesteps is None:
+                break
+            self.logger.dump(step=num_timesteps)
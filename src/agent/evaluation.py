@@ -0,0 +1,63 @@
+import numpy as np
+
+from src.agent.core_env import AzulCoreEnv
+from src.agent.policies import load_policy
+
+
+def play_match(policy_a, policy_b, num_games, seed=0):
+    """
+    Plays `num_games` two-player games between policies exposing `act(env)`,
+    alternating seats. Game `g` uses seed `seed + g` for the bag.
+
+    Returns win rate of A (ties count half), mean score margin (A - B) and
+    mean scores.
+    """
+    env = AzulCoreEnv(num_players=2)
+    wins = 0.0
+    scores_a, scores_b = [], []
+    for g in range(num_games):
+        env.reset(seed=seed + g)
+        a_seat = g % 2
+        seats = [policy_a, policy_b] if a_seat == 0 else [policy_b, policy_a]
+        for policy in seats:
+            policy.seed(seed + g)
+
+        done = False
+        while not done:
+            action = seats[env.game.current_player_idx].act(env)
+            _, _, terminated, truncated, _ = env.step(action)
+            done = terminated or truncated
+
+        a = env.game.players[a_seat].score
+        b = env.game.players[1 - a_seat].score
+        wins += 1.0 if a > b else 0.5 if a == b else 0.0
+        scores_a.append(a)
+        scores_b.append(b)
+
+    scores_a = np.array(scores_a, dtype=np.float64)
+    scores_b = np.array(scores_b, dtype=np.float64)
+    return {
+        "games": num_games,
+        "win_rate": wins / max(num_games, 1),
+        "margin": float(np.mean(scores_a - scores_b)) if num_games else 0.0,
+        "score_a": float(np.mean(scores_a)) if num_games else 0.0,
+        "score_b": float(np.mean(scores_b)) if num_games else 0.0,
+    }
+
+
+def evaluate_checkpoint(path, opponents, num_games, seed=0):
+    """
+    Plays the checkpoint at `path` against each opponent spec ("random",
+    "greedy" or another checkpoint path). Runs in an evaluation worker;
+    opponents whose file has since been deleted are skipped.
+    Returns {opponent spec: play_match result}.
+    """
+    policy = load_policy(path, seed)
+    results = {}
+    for spec in opponents:
+        try:
+            opponent = load_policy(spec, seed)
+        except FileNotFoundError:
+            continue
+        results[spec] = play_match(policy, opponent, num_games, seed=seed)
+    return results
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import numpy as np
+
+
+class BatchedPolicy:
+    """
+    Shares one loaded MaskablePPO between many asyncio tasks.
+
+    Callers `await predict(obs, mask)`; pending requests are collected until
+    either `max_batch` are waiting or `max_delay_ms` has passed since the
+    first one arrived, then answered with a single forward pass.
+    """
+
+    def __init__(self, model, max_batch=64, max_delay_ms=5.0, deterministic=True):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.deterministic = deterministic
+
+        self._queue = None
+        self._worker = None
+
+        # Stats
+        self.batches = 0
+        self.requests = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def predict(self, obs, mask):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((obs, mask, future))
+        return await future
+
+    @property
+    def mean_batch_size(self):
+        return self.requests / self.batches if self.batches else 0.0
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _forward(self, obs, masks):
+        actions, _ = self.model.predict(obs, action_masks=masks, deterministic=self.deterministic)
+        return actions
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            obs = np.stack([b[0] for b in batch])
+            masks = np.stack([b[1] for b in batch])
+            try:
+                # Off the event loop so socket I/O keeps flowing during the pass
+                actions = await loop.run_in_executor(None, self._forward, obs, masks)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, _, future), action in zip(batch, actions):
+                if not future.done():
+                    future.set_result(int(action))
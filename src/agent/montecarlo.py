@@ -0,0 +1,139 @@
+"""
+Monte Carlo estimate of who is winning an AzulGame position.
+
+Each playout is a determinized copy of the position: the factories and
+center on the table stay as they are, and every tile still to be drawn
+comes out of the bag on a fresh RNG stream (the bag only holds counts, so
+that is the reshuffle). The copies are played to the end by a rollout
+policy and their final scores compared.
+
+With Numba the copies run in one compiled, multi-threaded kernel
+(kernels.playouts); thousands of random playouts take well under a
+second. Without it they are played on the engine, optionally across a
+process pool.
+"""
+import statistics
+from multiprocessing import Pool
+
+import numpy as np
+
+from src.agent.core_env import AzulCoreEnv
+from src.agent.policies import RandomPolicy, GreedyPolicy
+from src.azul.backends import resolve_backend
+
+ROLLOUT_POLICIES = ("random", "greedy")
+# Playouts are scored as they stand after this many more rounds. Real games
+# last 5-8, but random play can leave tiles nobody can place, and those
+# cycle through the floor and the box forever.
+MAX_ROUNDS = 20
+
+
+def _kernel_finals(game, seeds, greedy, max_rounds):
+    from src.azul import kernels
+    players = game.players
+    out = np.empty((len(seeds), len(players)), dtype=np.int64)
+    kernels.playouts(
+        game.factories.copy(), game.center.copy(),
+        np.stack([p.wall for p in players]),
+        np.stack([p.pattern_lines_color for p in players]),
+        np.stack([p.pattern_lines_count for p in players]),
+        np.stack([p.floor_line for p in players]),
+        np.array([p.floor_line_count for p in players], dtype=np.int64),
+        np.array([p.score for p in players], dtype=np.int64),
+        game.bag.copy(), game.box.copy(),
+        bool(game.first_player_token_available), int(game.current_player_idx),
+        int(game.current_start_player), greedy, max_rounds, seeds, out)
+    return out
+
+
+def _engine_finals(task):
+    """Plays clones of `game` on the engine itself; one row of final scores per seed."""
+    game, seeds, rollout, max_rounds = task
+    env = AzulCoreEnv(num_players=game.num_players, backend="numpy")
+    policy = RandomPolicy() if rollout == "random" else GreedyPolicy()
+    out = np.empty((len(seeds), game.num_players), dtype=np.int64)
+    for i, seed in enumerate(seeds):
+        copy = game.clone(seed=int(seed))
+        env.game = copy
+        policy.seed(int(seed))
+        while not copy.is_game_over():
+            if copy.round_number - game.round_number >= max_rounds:
+                break
+            copy.step(env.to_game_action(policy.act(env)))
+        copy.apply_end_game_bonuses()
+        out[i] = [p.score for p in copy.players]
+    return out
+
+
+def summarize(finals, player, confidence=0.95):
+    """
+    Win probability and score margin of `player` from an (n, players) array
+    of final scores. A tie for first counts as a shared win; the margin is
+    against the best other player.
+
+    The win probability interval is Wilson's, the margin's a normal one.
+    """
+    finals = np.asarray(finals, dtype=np.float64)
+    n = len(finals)
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    winners = finals == finals.max(axis=1, keepdims=True)
+    shares = winners / winners.sum(axis=1, keepdims=True)
+    p = float(shares[:, player].mean())
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z / (1 + z * z / n) * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+
+    margins = finals[:, player] - np.delete(finals, player, axis=1).max(axis=1)
+    margin = float(margins.mean())
+    margin_half = z * margins.std(ddof=1) / np.sqrt(n) if n > 1 else 0.0
+
+    return {
+        "playouts": n,
+        "player": player,
+        "win_prob": p,
+        "win_prob_ci": (float(max(center - half, 0.0)), float(min(center + half, 1.0))),
+        "margin": margin,
+        "margin_ci": (margin - float(margin_half), margin + float(margin_half)),
+        "win_probs": shares.mean(axis=0).tolist(),
+        "mean_scores": finals.mean(axis=0).tolist(),
+    }
+
+
+def estimate_win_probability(game, num_playouts=2000, rollout="random", player=None, seed=0,
+                             confidence=0.95, backend="auto", workers=1, max_rounds=MAX_ROUNDS):
+    """
+    Win probability and expected margin of `player` (default: the player to
+    move) in `game`, from `num_playouts` determinized random or greedy
+    playouts. `game` is not modified. The same seed gives the same answer.
+
+    `backend` picks the compiled kernel ("jit"; the default "auto" uses it
+    when Numba is installed) or the engine ("numpy"); `workers` > 1
+    spreads engine playouts over a process pool (the kernel uses Numba's
+    threads).
+
+    Returns summarize()'s dict: win_prob, win_prob_ci, margin, margin_ci,
+    plus every player's win_probs and mean_scores.
+    """
+    if rollout not in ROLLOUT_POLICIES:
+        raise ValueError(f"Unknown rollout policy {rollout!r}; expected one of {ROLLOUT_POLICIES}")
+    if num_playouts < 1:
+        raise ValueError(f"num_playouts must be at least 1, got {num_playouts}")
+    if player is None:
+        player = game.current_player_idx
+
+    if game.is_game_over():
+        # Finished (AzulCoreEnv.step has added the end-game bonuses): nothing left to chance
+        return summarize([[p.score for p in game.players]], player, confidence)
+
+    seeds = np.random.default_rng(seed).integers(0, 2**63, size=num_playouts).astype(np.uint64)
+    if resolve_backend(backend) == "jit":
+        finals = _kernel_finals(game, seeds, rollout == "greedy", max_rounds)
+    elif workers > 1:
+        # A clone drops the game's event subscribers, which may not pickle
+        root = game.clone()
+        tasks = [(root, chunk, rollout, max_rounds) for chunk in np.array_split(seeds, workers) if len(chunk)]
+        with Pool(workers) as pool:
+            finals = np.concatenate(pool.map(_engine_finals, tasks))
+    else:
+        finals = _engine_finals((game, seeds, rollout, max_rounds))
+    return summarize(finals, player, confidence)
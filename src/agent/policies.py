@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class RandomPolicy:
+    """Uniformly random legal move."""
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def seed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def act(self, env):
+        return int(self.rng.choice(np.flatnonzero(env.action_masks())))
+
+
+class GreedyPolicy:
+    """
+    One-ply lookahead: maximises the mover's fully simulated virtual score
+    (end of round + end of game bonuses). Ties are broken randomly.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def seed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def act(self, env):
+        game = env.game
+        mover = game.current_player_idx
+        legal = np.flatnonzero(env.action_masks())
+        scores = np.empty(len(legal))
+        for i, action in enumerate(legal):
+            # A fresh seed is cheaper than copying the RNG stream, and the
+            # deal a round-ending move triggers doesn't change the score
+            child = game.clone(seed=0)
+            child.step(env.to_game_action(action))
+            scores[i] = child.players[mover].get_complete_virtual_score()
+        best = legal[scores == scores.max()]
+        return int(self.rng.choice(best))
+
+
+class ModelPolicy:
+    """Deterministic MaskablePPO checkpoint."""
+
+    def __init__(self, model, deterministic=True):
+        self.model = model
+        self.deterministic = deterministic
+
+    def seed(self, seed):
+        pass
+
+    def act(self, env):
+        action, _ = self.model.predict(env._get_obs(), action_masks=env.action_masks(),
+                                       deterministic=self.deterministic)
+        return int(action)
+
+
+def load_policy(spec, seed=None):
+    """`spec` is "random", "greedy" or a path to a MaskablePPO .zip."""
+    if spec == "random":
+        return RandomPolicy(seed)
+    if spec == "greedy":
+        return GreedyPolicy(seed)
+    from sb3_contrib import MaskablePPO
+    return ModelPolicy(MaskablePPO.load(spec, device="cpu"))
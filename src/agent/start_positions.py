@@ -0,0 +1,84 @@
+import glob
+import os
+
+import numpy as np
+
+from src.agent.core_env import AzulCoreEnv
+
+
+class StartPositionPool:
+    """
+    Round-start snapshots (see `AzulGame.encode_round_start`) stored as one
+    int16 matrix, so sampling and restoring a position is O(1).
+
+    Use with `AzulEnv(start_pool=pool, start_pool_prob=p)` or per reset via
+    `env.reset(options={"start_pool": pool})`.
+    """
+
+    def __init__(self, states, rounds):
+        self.states = np.asarray(states, dtype=np.int16)
+        self.rounds = np.asarray(rounds, dtype=np.int16)
+
+    def __len__(self):
+        return len(self.states)
+
+    def sample(self, rng):
+        return self.states[rng.integers(len(self.states))]
+
+    def filter_rounds(self, rounds):
+        keep = np.isin(self.rounds, rounds)
+        return StartPositionPool(self.states[keep], self.rounds[keep])
+
+    # --- PERSISTENCE ---
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, states=self.states, rounds=self.rounds)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["states"], data["rounds"])
+
+    # --- BUILDING ---
+    @staticmethod
+    def _collect(env, rounds, out_states, out_rounds):
+        game = env.game
+        if game.round_number in rounds:
+            out_states.append(game.encode_round_start())
+            out_rounds.append(game.round_number)
+
+    @classmethod
+    def from_self_play(cls, policy, num_games, rounds=(3, 4, 5), num_players=2, seed=0):
+        """Plays seeded games with `policy` and snapshots the chosen rounds."""
+        env = AzulCoreEnv(num_players=num_players)
+        states, found_rounds = [], []
+        for g in range(num_games):
+            env.reset(seed=seed + g)
+            policy.seed(seed + g)
+            cls._collect(env, rounds, states, found_rounds)
+            done = False
+            while not done:
+                prev_round = env.game.round_number
+                _, _, terminated, truncated, _ = env.step(policy.act(env))
+                done = terminated or truncated
+                if not done and env.game.round_number != prev_round:
+                    cls._collect(env, rounds, states, found_rounds)
+        return cls(states, found_rounds)
+
+    @classmethod
+    def from_recorded(cls, record_dir, rounds=(3, 4, 5), num_players=2):
+        """Replays games saved by `src/analytics.py --record` and snapshots them."""
+        env = AzulCoreEnv(num_players=num_players)
+        states, found_rounds = [], []
+        for path in sorted(glob.glob(os.path.join(record_dir, "chunk_*.npz"))):
+            with np.load(path) as data:
+                splits = np.cumsum(data["lengths"])[:-1]
+                for seed, actions in zip(data["seeds"], np.split(data["actions"], splits)):
+                    env.reset(seed=int(seed))
+                    cls._collect(env, rounds, states, found_rounds)
+                    for action in actions[:-1]:
+                        prev_round = env.game.round_number
+                        env.step(int(action))
+                        if env.game.round_number != prev_round:
+                            cls._collect(env, rounds, states, found_rounds)
+        return cls(states, found_rounds)
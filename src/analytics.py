@@ -0,0 +1,240 @@
+import sys
+import os
+import argparse
+import glob
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.core_env import AzulCoreEnv
+from src.agent.policies import load_policy
+from src.azul.backends import BACKENDS
+
+# --- CONFIGURATION ---
+NUM_PLAYERS = 2
+CHUNK_SIZE = 250          # Games per worker task
+SCORE_BINS = 256          # Histogram of final scores (0..255) for percentiles
+ENGINE_BACKEND = "auto"   # Compiled engine when Numba is installed (src/azul/backends.py)
+
+PLAYER_FIELDS = ("score", "floor_penalty", "rows", "columns", "colors", "first_player_tokens", "won")
+GAME_FIELDS = ("rounds", "turns", "margin")
+
+_POLICIES = {}  # Per-worker cache so checkpoints load once per process
+
+
+class StreamingStats:
+    """
+    Fixed-size running moments over a table of fields. Chunks are folded in
+    with vectorized reductions, so memory does not grow with game count.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        k = len(fields)
+        self.n = 0
+        self.sum = np.zeros(k)
+        self.sumsq = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+
+    def update(self, rows):
+        if len(rows) == 0:
+            return
+        rows = rows.astype(np.float64)
+        self.n += len(rows)
+        self.sum += rows.sum(axis=0)
+        self.sumsq += np.square(rows).sum(axis=0)
+        self.min = np.minimum(self.min, rows.min(axis=0))
+        self.max = np.maximum(self.max, rows.max(axis=0))
+
+    def mean(self):
+        return self.sum / max(self.n, 1)
+
+    def std(self):
+        var = self.sumsq / max(self.n, 1) - np.square(self.mean())
+        return np.sqrt(np.maximum(var, 0))
+
+
+class Report:
+    def __init__(self, name):
+        self.name = name
+        self.players = StreamingStats(PLAYER_FIELDS)
+        self.games = StreamingStats(GAME_FIELDS)
+        self.score_hist = np.zeros(SCORE_BINS, dtype=np.int64)
+
+    def update(self, player_rows, game_rows):
+        self.players.update(player_rows)
+        self.games.update(game_rows)
+        scores = np.clip(player_rows[:, 0], 0, SCORE_BINS - 1).astype(np.int64)
+        self.score_hist += np.bincount(scores, minlength=SCORE_BINS)
+
+    def score_percentile(self, q):
+        cdf = np.cumsum(self.score_hist)
+        return int(np.searchsorted(cdf, q / 100 * cdf[-1]))
+
+
+# --- GAME DRIVER ---
+def wall_completions(wall):
+    filled = wall != 0
+    rows = int(filled.all(axis=1).sum())
+    columns = int(filled.all(axis=0).sum())
+    colors = int((np.bincount(wall.ravel(), minlength=6)[1:] == wall.shape[0]).sum())
+    return rows, columns, colors
+
+
+def play_game(env, policy, seed, actions=None):
+    """
+    Plays (or replays `actions`) one seeded game.
+    Returns (player_rows, game_row, played_actions).
+    """
+    env.reset(seed=seed)
+    if policy is not None:
+        policy.seed(seed)
+    n = env.num_players
+    tokens = np.zeros(n)
+    played = []
+    done = False
+    while not done:
+        game = env.game
+        action = int(actions[len(played)]) if actions is not None else policy.act(env)
+        source, _, _ = env.to_game_action(action)
+        if source == -1 and game.first_player_token_available:
+            tokens[game.current_player_idx] += 1
+        _, _, terminated, truncated, info = env.step(action)
+        done = terminated or truncated
+        if not info["valid"]:
+            raise ValueError(f"Illegal action {action} in game with seed {seed}")
+        played.append(action)
+
+    game = env.game
+    scores = np.array([p.score for p in game.players], dtype=np.float64)
+    winners = scores == scores.max()
+    player_rows = np.zeros((n, len(PLAYER_FIELDS)))
+    for i, p in enumerate(game.players):
+        player_rows[i] = (p.score, p.penalty_total, *wall_completions(p.wall), tokens[i],
+                          winners[i] / winners.sum())
+    ranked = np.sort(scores)
+    game_row = (game.round_number, len(played), ranked[-1] - ranked[-2])
+    return player_rows, game_row, played
+
+
+def _run_chunk(task):
+    spec, seeds, replay, backend = task
+    env = AzulCoreEnv(num_players=NUM_PLAYERS, backend=backend)
+    policy = None
+    if replay is None:
+        if spec not in _POLICIES:
+            _POLICIES[spec] = load_policy(spec)
+        policy = _POLICIES[spec]
+
+    player_rows, game_rows, recorded = [], [], []
+    for i, seed in enumerate(seeds):
+        actions = replay[i] if replay is not None else None
+        p_rows, g_row, played = play_game(env, policy, int(seed), actions)
+        player_rows.append(p_rows)
+        game_rows.append(g_row)
+        recorded.append(played)
+    return spec, np.concatenate(player_rows), np.array(game_rows), seeds, recorded
+
+
+def _worker_init():
+    # One BLAS/torch thread per process; the pool provides the parallelism.
+    # torch reads OMP_NUM_THREADS when a model policy first imports it, so
+    # random/greedy workers never load it at all.
+    os.environ["OMP_NUM_THREADS"] = "1"
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(1)
+
+
+# --- RECORDING ---
+def save_chunk(record_dir, spec, chunk_idx, seeds, recorded):
+    name = os.path.splitext(os.path.basename(spec))[0]
+    os.makedirs(os.path.join(record_dir, name), exist_ok=True)
+    lengths = np.array([len(a) for a in recorded], dtype=np.int32)
+    np.savez_compressed(
+        os.path.join(record_dir, name, f"chunk_{chunk_idx:06d}.npz"),
+        seeds=np.asarray(seeds, dtype=np.int64),
+        lengths=lengths,
+        actions=np.concatenate([np.asarray(a, dtype=np.int16) for a in recorded]),
+    )
+
+
+def recorded_tasks(record_dir):
+    """Streams replay tasks from chunk files, one chunk in memory at a time."""
+    for path in sorted(glob.glob(os.path.join(record_dir, "chunk_*.npz"))):
+        with np.load(path) as data:
+            splits = np.cumsum(data["lengths"])[:-1]
+            yield record_dir, data["seeds"], np.split(data["actions"], splits)
+
+
+def generated_tasks(specs, num_games, seed):
+    # Same seeds for every policy, so comparisons are paired
+    for start in range(0, num_games, CHUNK_SIZE):
+        seeds = np.arange(seed + start, seed + min(start + CHUNK_SIZE, num_games))
+        for spec in specs:
+            yield spec, seeds, None
+
+
+# --- REPORTING ---
+def print_reports(reports, elapsed):
+    names = [r.name for r in reports]
+    width = max(18, *(len(os.path.basename(n)) + 2 for n in names))
+    header = "".join(os.path.basename(n).rjust(width) for n in names)
+    print("\n" + "metric".ljust(30) + header)
+    print("-" * (30 + width * len(names)))
+
+    def row(label, values):
+        print(label.ljust(30) + "".join(v.rjust(width) for v in values))
+
+    row("games", [f"{r.games.n:,}" for r in reports])
+    for i, field in enumerate(PLAYER_FIELDS):
+        row(f"{field} / player", [f"{r.players.mean()[i]:.2f} ± {r.players.std()[i]:.2f}" for r in reports])
+    for i, field in enumerate(GAME_FIELDS):
+        row(f"{field} / game", [f"{r.games.mean()[i]:.2f} ± {r.games.std()[i]:.2f}" for r in reports])
+    for q in (10, 50, 90):
+        row(f"score p{q}", [str(r.score_percentile(q)) for r in reports])
+    row("max score", [f"{r.players.max[0]:.0f}" for r in reports])
+
+    total = sum(r.games.n for r in reports)
+    print(f"\n{total:,} games in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} games/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate self-play statistics for one or more policies")
+    parser.add_argument("policies", nargs="*", default=["random"],
+                        help="'random', 'greedy' or checkpoint .zip paths; compared side by side")
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--record", help="Directory to save played games (seed + actions) for later replay")
+    parser.add_argument("--replay", nargs="+", help="Recorded game directories to analyse instead of playing")
+    parser.add_argument("--backend", default=ENGINE_BACKEND, choices=BACKENDS,
+                        help="Engine backend; both play identical games")
+    args = parser.parse_args()
+
+    if args.replay:
+        reports = {d: Report(d) for d in args.replay}
+        tasks = (t for d in args.replay for t in recorded_tasks(d))
+    else:
+        reports = {spec: Report(spec) for spec in args.policies}
+        tasks = generated_tasks(args.policies, args.games, args.seed)
+    tasks = ((*task, args.backend) for task in tasks)
+
+    start = time.time()
+    chunk_counts = {}
+    with Pool(args.workers, initializer=_worker_init) as pool:
+        for spec, player_rows, game_rows, seeds, recorded in pool.imap_unordered(_run_chunk, tasks):
+            reports[spec].update(player_rows, game_rows)
+            if args.record and not args.replay:
+                chunk_counts[spec] = chunk_counts.get(spec, 0) + 1
+                save_chunk(args.record, spec, chunk_counts[spec], seeds, recorded)
+
+    print_reports(list(reports.values()), time.time() - start)
+
+
+if __name__ == "__main__":
+    main()
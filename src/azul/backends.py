@@ -0,0 +1,33 @@
+import os
+import warnings
+
+# "auto" uses the compiled kernels when Numba is installed, else NumPy.
+# The default stays NumPy: importing and compiling Numba costs every
+# process over half a second, which only pays off over a long run. The
+# training scripts ask for "auto" themselves. Override per process with
+# AZUL_BACKEND=numpy|jit|auto.
+BACKENDS = ("auto", "numpy", "jit")
+DEFAULT_BACKEND = os.environ.get("AZUL_BACKEND", "numpy")
+
+
+def resolve_backend(name=None):
+    """Concrete backend ("numpy" or "jit") for a requested name."""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown engine backend {name!r}; expected one of {BACKENDS}")
+    if name == "numpy":
+        return name
+    from . import kernels
+    if not kernels.HAVE_NUMBA:
+        if name == "jit":
+            warnings.warn("Numba is not installed; falling back to the NumPy engine.")
+        return "numpy"
+    return "jit"
+
+
+def game_class(name=None):
+    if resolve_backend(name) == "jit":
+        from .jit_game import JitAzulGame
+        return JitAzulGame
+    from .game import AzulGame
+    return AzulGame
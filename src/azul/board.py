@@ -3,10 +3,16 @@ from .constants import (
     GRID_SIZE, 
     EMPTY, 
     FLOOR_LINE_CAPACITY, 
-    FLOOR_LINE_SCORES, 
-    WALL_PATTERN
+    FLOOR_PENALTY_TOTAL,
+    WALL_PATTERN,
+    WALL_COLUMN,
+    PLAYABLE_COLORS
 )
 
+_ROWS = np.arange(GRID_SIZE)
+_ROW_CAPACITY = _ROWS + 1
+_COLORS = np.array(PLAYABLE_COLORS, dtype=np.int8)
+
 class PlayerBoard:
     def __init__(self):
         self.reset()
@@ -18,6 +24,19 @@ class PlayerBoard:
         self.pattern_lines_count = np.zeros(GRID_SIZE, dtype=np.int8)
         self.floor_line = np.zeros(FLOOR_LINE_CAPACITY, dtype=np.int8)
         self.floor_line_count = 0
+        # Running total of floor penalties, for analytics
+        self.penalty_total = 0
+
+    def clone(self):
+        other = type(self).__new__(type(self))
+        other.score = self.score
+        other.wall = self.wall.copy()
+        other.pattern_lines_color = self.pattern_lines_color.copy()
+        other.pattern_lines_count = self.pattern_lines_count.copy()
+        other.floor_line = self.floor_line.copy()
+        other.floor_line_count = self.floor_line_count
+        other.penalty_total = self.penalty_total
+        return other
 
     def get_row_capacity(self, row_idx):
         return row_idx + 1
@@ -34,6 +53,17 @@ class PlayerBoard:
         if current_color != EMPTY and current_color != color: return False
         return True
 
+    def placeable_mask(self):
+        """
+        Vectorized can_add_to_pattern_line for every (row, color) pair.
+        Returns a (GRID_SIZE, len(PLAYABLE_COLORS)) bool array.
+        """
+        wall_free = self.wall[_ROWS[:, None], WALL_COLUMN] == EMPTY
+        has_room = self.pattern_lines_count < _ROW_CAPACITY
+        line_color = self.pattern_lines_color[:, None]
+        color_ok = (line_color == EMPTY) | (line_color == _COLORS[None, :])
+        return wall_free & has_room[:, None] & color_ok
+
     def add_tiles(self, row_idx, color, count):
         if row_idx == -1:
             self._add_to_floor_line(color, count)
@@ -61,15 +91,22 @@ class PlayerBoard:
         return True
 
     def _add_to_floor_line(self, color, count):
-        for _ in range(count):
-            if self.floor_line_count < FLOOR_LINE_CAPACITY:
-                self.floor_line[self.floor_line_count] = color
-                self.floor_line_count += 1
+        # Tiles beyond the floor line's capacity are lost
+        start = self.floor_line_count
+        end = min(start + count, FLOOR_LINE_CAPACITY)
+        self.floor_line[start:end] = color
+        self.floor_line_count = end
 
-    def calculate_round_bonuses(self, verbose=False):
+    def calculate_round_bonuses(self, placed=None):
+        """
+        Moves full pattern lines to the wall and scores the round.
+        Returns (round_score, discards, penalty) where discards[color_id] is
+        the number of tiles of that color going back to the box. If a
+        `placed` list is given, (row, col, points) is appended to it for
+        every tile moved to the wall.
+        """
         round_score = 0
-        discarded_tiles = []
-        logs = []
+        discards = np.zeros(6, dtype=np.int16)
 
         for row in range(GRID_SIZE):
             capacity = self.get_row_capacity(row)
@@ -79,32 +116,22 @@ class PlayerBoard:
                 
                 self.wall[row, col] = color
                 # Pass self.wall implicitly
-                pts, log_msg = self._calculate_placement_score(row, col, self.wall, return_log=True)
+                pts = self._calculate_placement_score(row, col, self.wall)
                 round_score += pts
-                if verbose: logs.append(f"Row {row}: {log_msg}")
-                
-                num_discarded = capacity - 1
-                if num_discarded > 0:
-                    discarded_tiles.extend([color] * num_discarded)
+                if placed is not None: placed.append((row, int(col), pts))
                 
+                discards[color] += capacity - 1
+
                 self.pattern_lines_count[row] = 0
                 self.pattern_lines_color[row] = EMPTY
             
-        penalty = 0
-        limit = min(self.floor_line_count, len(FLOOR_LINE_SCORES))
-        for i in range(limit): penalty += FLOOR_LINE_SCORES[i]
-        
-        if self.floor_line_count > len(FLOOR_LINE_SCORES):
-             penalty += (self.floor_line_count - len(FLOOR_LINE_SCORES)) * FLOOR_LINE_SCORES[-1]
-
-        if penalty != 0 and verbose: logs.append(f"Floor Penalty: {penalty}")
-
+        penalty = FLOOR_PENALTY_TOTAL[self.floor_line_count]
         round_score += penalty
-        
-        limit_recycle = min(self.floor_line_count, FLOOR_LINE_CAPACITY)
-        for i in range(limit_recycle):
-            tile = self.floor_line[i]
-            if tile != EMPTY and tile != 6: discarded_tiles.append(tile)
+        self.penalty_total += penalty
+
+        # Floor tiles go to the box too (the first player token, id 6, does not)
+        floor_counts = np.bincount(self.floor_line[:self.floor_line_count], minlength=7)
+        discards[1:6] += floor_counts[1:6]
 
         self.score += round_score
         if self.score < 0: self.score = 0
@@ -112,7 +139,7 @@ class PlayerBoard:
         self.floor_line.fill(EMPTY)
         self.floor_line_count = 0
         
-        return round_score, discarded_tiles, logs
+        return round_score, discards, penalty
 
     def calculate_end_game_score(self):
         bonus = 0
@@ -149,14 +176,7 @@ class PlayerBoard:
                 v_score += pts
 
         # 2. Simulate Floor Penalty
-        penalty = 0
-        limit = min(self.floor_line_count, len(FLOOR_LINE_SCORES))
-        for i in range(limit): penalty += FLOOR_LINE_SCORES[i]
-        
-        if self.floor_line_count > len(FLOOR_LINE_SCORES):
-             penalty += (self.floor_line_count - len(FLOOR_LINE_SCORES)) * FLOOR_LINE_SCORES[-1]
-             
-        v_score += penalty
+        v_score += FLOOR_PENALTY_TOTAL[self.floor_line_count]
         if v_score < 0: v_score = 0
         
         # 3. Add End Game Bonuses (Based on Virtual Wall)
@@ -170,7 +190,7 @@ class PlayerBoard:
             
         return v_score + bonus
 
-    def _calculate_placement_score(self, row, col, wall_state, return_log=False):
+    def _calculate_placement_score(self, row, col, wall_state):
         """
         Calculates adjacency score.
         Args:
@@ -204,7 +224,6 @@ class PlayerBoard:
         if horiz_points == 0 and vert_points == 0: total = 1 
         else: total = max(horiz_points, 0) + max(vert_points, 0)
             
-        if return_log: return total, f"Points: {total}"
         return total
 
     def get_state_vector(self):
@@ -32,6 +32,8 @@ GRID_SIZE = 5
 FLOOR_LINE_CAPACITY = 7
 # The penalty points for the floor line (1st slot = -1, 2nd = -1, etc.)
 FLOOR_LINE_SCORES = np.array([-1, -1, -2, -2, -2, -3, -3], dtype=np.int8)
+# Total penalty for a floor line holding n tiles, as plain ints: FLOOR_PENALTY_TOTAL[n]
+FLOOR_PENALTY_TOTAL = [0] + np.cumsum(FLOOR_LINE_SCORES).tolist()
 
 # --- 4. THE WALL PATTERN ---
 # Pre-calculated matrix of what color goes where on the wall
@@ -41,4 +43,7 @@ WALL_PATTERN = np.array([
     [BLACK,  WHITE,  BLUE,   YELLOW, RED],
     [RED,    BLACK,  WHITE,  BLUE,   YELLOW],
     [YELLOW, RED,    BLACK,  WHITE,  BLUE]
-], dtype=np.int8)
\ No newline at end of file
+], dtype=np.int8)
+
+# Column of each color in each row: WALL_COLUMN[row, color - 1]
+WALL_COLUMN = np.argsort(WALL_PATTERN, axis=1)
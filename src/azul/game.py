@@ -1,3 +1,4 @@
+import hashlib
 import numpy as np
 import random
 from .constants import (
@@ -14,16 +15,22 @@ from .constants import (
 from .board import PlayerBoard
 
 class AzulGame:
-    def __init__(self, num_players=2):
+    board_class = PlayerBoard
+
+    def __init__(self, num_players=2, seed=None):
         self.num_players = num_players
         if num_players not in FACTORY_COUNTS:
             raise ValueError(f"Invalid number of players: {num_players}")
         
         self.num_factories = FACTORY_COUNTS[num_players]
-        self.players = [PlayerBoard() for _ in range(num_players)]
+        # Each game owns its RNG so bag draws are reproducible per seed
+        # and can be checkpointed alongside the rest of the game state.
+        self.rng = random.Random(seed)
+        self.players = [self.board_class() for _ in range(num_players)]
         
-        self.bag = {} 
-        self.box = {} 
+        # Tile counts indexed by color id, like the center (slot 0 unused)
+        self.bag = np.zeros(6, dtype=np.int16)
+        self.box = np.zeros(6, dtype=np.int16)
         self.factories = np.zeros((self.num_factories, 6), dtype=np.int8)
         self.center = np.zeros(6, dtype=np.int8)
         
@@ -31,32 +38,69 @@ class AzulGame:
         self.current_start_player = 0 
         self.current_player_idx = 0   
         self.round_number = 0
+        self.turn_in_round = 0
+        # Bumped by every mutating method, so (game, version) names one
+        # state; caches of derived data (masks, obs) key on it
+        self.version = 0
         
-        # Stores debug logs for the last round
-        self.round_logs = {}
+        # Scoring event callbacks (see subscribe); none in training
+        self._subscribers = []
         
         self.reset()
 
-    def reset(self):
+    def reset(self, seed=None):
+        self.version += 1
+        if seed is not None:
+            self.rng.seed(seed)
         for p in self.players:
             p.reset()
             
-        self.bag = {c: TILES_PER_COLOR for c in PLAYABLE_COLORS}
-        self.box = {c: 0 for c in PLAYABLE_COLORS}
+        self.bag.fill(0)
+        self.bag[PLAYABLE_COLORS] = TILES_PER_COLOR
+        self.box.fill(0)
         
         self.round_number = 0
-        self.current_start_player = random.randint(0, self.num_players - 1)
+        self.current_start_player = self.rng.randint(0, self.num_players - 1)
         self.start_new_round()
         
         return self.get_global_state()
 
+    def clone(self, seed=None):
+        """
+        Fast independent copy (much cheaper than copy.deepcopy). The copy
+        continues the same RNG stream unless a new `seed` is given.
+        """
+        other = type(self).__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        if seed is not None:
+            other.rng = random.Random(seed)
+        else:
+            # Unseeded: random.Random() would read os.urandom only for
+            # setstate to overwrite it
+            other.rng = random.Random.__new__(random.Random)
+            other.rng.setstate(self.rng.getstate())
+        other.players = [p.clone() for p in self.players]
+        other.bag = self.bag.copy()
+        other.box = self.box.copy()
+        other.factories = self.factories.copy()
+        other.center = self.center.copy()
+        # Lookahead copies must not report their scoring to our subscribers
+        other._subscribers = []
+        return other
+
     def start_new_round(self):
+        self.version += 1
         self.round_number += 1
         self.current_player_idx = self.current_start_player
         self.factories.fill(0)
         self.center.fill(0)
         self.first_player_token_available = True
-        self.round_logs = {} # Clear logs
+        self.turn_in_round = 0
+        # Bag and box before the deal, for encode_round_start (a deal can
+        # refill the bag from the box partway through). Replaced, never
+        # written in place, so clones may share them.
+        self._bag_before_deal = self.bag.copy()
+        self._box_before_deal = self.box.copy()
         
         for f_idx in range(self.num_factories):
             for _ in range(TILES_PER_FACTORY):
@@ -65,23 +109,25 @@ class AzulGame:
                     self.factories[f_idx, color] += 1
 
     def _draw_tile(self):
-        total_bag = sum(self.bag.values())
-        if total_bag == 0:
-            total_box = sum(self.box.values())
-            if total_box == 0: return None 
-            self.bag = self.box.copy()
-            self.box = {c: 0 for c in PLAYABLE_COLORS}
-            total_bag = total_box
-
-        choices = list(self.bag.keys())
-        weights = list(self.bag.values())
-        color = random.choices(choices, weights=weights, k=1)[0]
+        cumulative = np.cumsum(self.bag[1:])
+        if cumulative[-1] == 0:
+            if not self.box.any(): return None
+            self.bag[:] = self.box
+            self.box.fill(0)
+            cumulative = np.cumsum(self.bag[1:])
+
+        # Same draw as rng.choices(PLAYABLE_COLORS, weights=bag counts), so
+        # seeded games are unchanged: bisect a uniform into the running total.
+        u = self.rng.random() * float(cumulative[-1])
+        idx = min(int(np.searchsorted(cumulative, u, side="right")), len(cumulative) - 1)
+        color = PLAYABLE_COLORS[idx]
         self.bag[color] -= 1
         return color
 
     def step(self, action):
         source_idx, color, target_row = action
         player = self.players[self.current_player_idx]
+        self.version += 1
         
         tiles_taken = 0
         
@@ -105,6 +151,7 @@ class AzulGame:
                     self.center[c] += remainder
                     self.factories[source_idx, c] = 0
 
+        self.turn_in_round += 1
         success = player.add_tiles(target_row, color, tiles_taken)
         if not success:
             player.add_tiles(-1, color, tiles_taken)
@@ -124,25 +171,59 @@ class AzulGame:
         return factories_empty and center_empty
 
     def _end_round_processing(self):
-        self.round_logs = {} 
         for i, p in enumerate(self.players):
-            # Capture Verbose Logs
-            _, discarded_tiles, logs = p.calculate_round_bonuses(verbose=True)
-            self.round_logs[i] = logs
-            
-            for tile in discarded_tiles:
-                if tile in self.box: self.box[tile] += 1
+            # Placements are only collected when someone is listening
+            placed = [] if self._subscribers else None
+            _, discards, penalty = p.calculate_round_bonuses(placed)
+            self.box += discards
+            if placed is not None:
+                self._emit_round_events(i, p, placed, penalty)
 
     def apply_end_game_bonuses(self):
-        for p in self.players:
-            p.calculate_end_game_score()
+        self.version += 1
+        for i, p in enumerate(self.players):
+            bonus = p.calculate_end_game_score()
+            if self._subscribers:
+                self._emit({"type": "end_game", "player": i, "points": bonus})
+
+    # --- SCORING EVENTS ---
+    def subscribe(self, callback):
+        """
+        Calls `callback(event)` for every scoring event from now on. Events
+        are dicts with a "type" and the scoring "player":
+            "row":      round, row, col, color, points (a tile moved to the wall)
+            "floor":    round, penalty (only when non-zero)
+            "end_game": points (the end-game bonus, possibly 0)
+        Clones start without subscribers.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def _emit(self, event):
+        for callback in self._subscribers:
+            callback(event)
+
+    def _emit_round_events(self, player_idx, board, placed, penalty):
+        for row, col, points in placed:
+            self._emit({"type": "row", "player": player_idx, "round": self.round_number, "row": row,
+                        "col": col, "color": int(board.wall[row, col]), "points": points})
+        if penalty != 0:
+            self._emit({"type": "floor", "player": player_idx, "round": self.round_number,
+                        "penalty": penalty})
 
     def is_game_over(self):
         for p in self.players:
             for row in range(GRID_SIZE):
                 if np.count_nonzero(p.wall[row]) == GRID_SIZE:
                     return True
-        return False
+        return self._out_of_tiles()
+
+    def _out_of_tiles(self):
+        # Bag and box were both empty at the deal (every tile is on a wall,
+        # a pattern line or lost): nobody can move, so the game ends here
+        return self.turn_in_round == 0 and not self.factories.any()
 
     def get_global_state(self):
         return {
@@ -151,4 +232,66 @@ class AzulGame:
             "players": [p.get_state_vector() for p in self.players],
             "current_player": self.current_player_idx,
             "first_player_token": 1 if self.first_player_token_available else 0
-        }
\ No newline at end of file
+        }
+
+    def state_key(self):
+        """
+        16-byte hash of the position as the policy observes it: factories,
+        center, boards, player to move and start token. Transpositions map
+        to the same key; scores and the bag are not part of it.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.factories.tobytes())
+        h.update(self.center.tobytes())
+        for p in self.players:
+            h.update(p.get_state_vector().tobytes())
+        h.update(bytes((self.current_player_idx, int(self.first_player_token_available))))
+        return h.digest()
+
+    # --- ROUND-START SNAPSHOTS ---
+    # Layout (int16): [num_players, round, start_player, bag x5, box x5]
+    # then per player [score, wall x25, pattern colors x5, pattern counts x5]
+    def encode_round_start(self):
+        """
+        Compact snapshot of the position before this round's factories were
+        dealt (bag and box as they were at the deal). Only valid before the
+        first move of a round.
+        """
+        if self.turn_in_round != 0:
+            raise ValueError("Snapshots can only be taken at the start of a round.")
+        header = [self.num_players, self.round_number, self.current_start_player]
+        header += self._bag_before_deal[1:].tolist()
+        header += self._box_before_deal[1:].tolist()
+        parts = [np.array(header, dtype=np.int16)]
+        for p in self.players:
+            parts.append(np.array([p.score], dtype=np.int16))
+            parts.append(p.wall.ravel().astype(np.int16))
+            parts.append(p.pattern_lines_color.astype(np.int16))
+            parts.append(p.pattern_lines_count.astype(np.int16))
+        return np.concatenate(parts)
+
+    def restore_round_start(self, state):
+        """
+        Restores an `encode_round_start()` snapshot and deals the factories
+        from this game's RNG, so the same snapshot + seed gives the same deal.
+        """
+        if int(state[0]) != self.num_players:
+            raise ValueError(f"Snapshot is for {int(state[0])} players, game has {self.num_players}.")
+        self.version += 1
+        n_colors = len(PLAYABLE_COLORS)
+        self.round_number = int(state[1]) - 1  # start_new_round increments it
+        self.current_start_player = int(state[2])
+        self.bag[1:] = state[3:3 + n_colors]
+        self.box[1:] = state[3 + n_colors:3 + 2 * n_colors]
+
+        offset = 3 + 2 * n_colors
+        cells = GRID_SIZE * GRID_SIZE
+        for p in self.players:
+            p.reset()
+            p.score = int(state[offset])
+            p.wall[:] = state[offset + 1:offset + 1 + cells].reshape(GRID_SIZE, GRID_SIZE)
+            offset += 1 + cells
+            p.pattern_lines_color[:] = state[offset:offset + GRID_SIZE]
+            p.pattern_lines_count[:] = state[offset + GRID_SIZE:offset + 2 * GRID_SIZE]
+            offset += 2 * GRID_SIZE
+        self.start_new_round()
@@ -0,0 +1,209 @@
+import numpy as np
+
+from . import kernels
+from .constants import GRID_SIZE, TILES_PER_FACTORY, WALL_COLUMN
+from .board import PlayerBoard
+from .game import AzulGame
+
+
+class JitPlayerBoard(PlayerBoard):
+    """
+    PlayerBoard with its scoring and placement routed through `kernels`.
+    The board arrays are views into one int8 buffer, `cells`, laid out as
+    get_state_vector, so the env's kernels take a board as a single array.
+    """
+
+    def reset(self):
+        super().reset()
+        self._pack()
+
+    def clone(self):
+        other = type(self).__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        other._use_cells(self.cells.copy())
+        return other
+
+    def _pack(self):
+        self._use_cells(np.concatenate([self.wall.ravel(), self.pattern_lines_color,
+                                        self.pattern_lines_count, self.floor_line]))
+
+    def _use_cells(self, cells):
+        n = GRID_SIZE * GRID_SIZE
+        self.cells = cells
+        self.wall = cells[:n].reshape(GRID_SIZE, GRID_SIZE)
+        self.pattern_lines_color = cells[n:n + GRID_SIZE]
+        self.pattern_lines_count = cells[n + GRID_SIZE:n + 2 * GRID_SIZE]
+        self.floor_line = cells[n + 2 * GRID_SIZE:]
+        self._row_points = np.empty(GRID_SIZE, dtype=np.int64)  # round_bonuses scratch
+
+    def get_state_vector(self):
+        return self.cells.copy()
+
+    def can_add_to_pattern_line(self, row_idx, color):
+        return kernels.can_add(self.wall, self.pattern_lines_color, self.pattern_lines_count,
+                               int(row_idx), int(color))
+
+    def placeable_mask(self):
+        out = np.empty((GRID_SIZE, GRID_SIZE), dtype=bool)
+        kernels.placeable_mask(self.wall, self.pattern_lines_color, self.pattern_lines_count, out)
+        return out
+
+    def add_tiles(self, row_idx, color, count):
+        if row_idx != -1 and not self.can_add_to_pattern_line(row_idx, color):
+            return False
+        self.floor_line_count = kernels.place_tiles(
+            self.wall, self.pattern_lines_color, self.pattern_lines_count,
+            self.floor_line, self.floor_line_count, int(row_idx), int(color), int(count))
+        return True
+
+    def _add_to_floor_line(self, color, count):
+        self.floor_line_count = kernels.add_to_floor(self.floor_line, self.floor_line_count,
+                                                     int(color), int(count))
+
+    def calculate_round_bonuses(self, placed=None):
+        discards = np.zeros(6, dtype=np.int16)
+        round_score, penalty, _ = self.score_round(discards, placed)
+        return round_score, discards, penalty
+
+    def score_round(self, discards, placed=None):
+        """
+        calculate_round_bonuses adding the returned tiles to `discards` (the
+        game's box) in place. Returns (points, penalty, whether a wall row
+        is now complete).
+        """
+        row_points = self._row_points
+        # The kernel clears the pattern lines; keep their colors for `placed`
+        colors = self.pattern_lines_color.tolist() if placed is not None else None
+        round_score, penalty, full_row = kernels.round_bonuses(
+            self.wall, self.pattern_lines_color, self.pattern_lines_count,
+            self.floor_line, self.floor_line_count, discards, row_points)
+        round_score, penalty = int(round_score), int(penalty)
+
+        if placed is not None:
+            for row, pts in enumerate(row_points.tolist()):
+                if pts >= 0:
+                    placed.append((row, int(WALL_COLUMN[row, colors[row] - 1]), pts))
+
+        self.penalty_total += penalty
+        self.score += round_score
+        if self.score < 0: self.score = 0
+        self.floor_line_count = 0
+        return round_score, penalty, full_row
+
+    def calculate_end_game_score(self):
+        bonus = int(kernels.end_game_bonus(self.wall))
+        self.score += bonus
+        return bonus
+
+    def get_complete_virtual_score(self):
+        return int(kernels.virtual_score(self.wall, self.pattern_lines_color, self.pattern_lines_count,
+                                         self.floor_line_count, self.score))
+
+    def _calculate_placement_score(self, row, col, wall_state):
+        return int(kernels.placement_score(wall_state, int(row), int(col)))
+
+
+class JitAzulGame(AzulGame):
+    """
+    AzulGame on the compiled kernels. Same rules, same RNG stream: a seeded
+    game plays out identically on either backend (see src/fuzz_engine.py).
+    """
+
+    board_class = JitPlayerBoard
+    # Whether some wall has a full row. Walls only change at round end,
+    # which sets this, or when reset/restore set up a new game, which clear it
+    _full_row = None
+
+    def reset(self, seed=None):
+        self._full_row = None
+        return super().reset(seed)
+
+    def restore_round_start(self, state):
+        self._full_row = None
+        super().restore_round_start(state)
+
+    def start_new_round(self):
+        self.version += 1
+        self.round_number += 1
+        self.current_player_idx = self.current_start_player
+        self.first_player_token_available = True
+        self.turn_in_round = 0
+        self._bag_before_deal = self.bag.copy()
+        self._box_before_deal = self.box.copy()
+
+        # One uniform per tile actually drawn, as AzulGame._draw_tile consumes them
+        n = min(self.num_factories * TILES_PER_FACTORY,
+                kernels.clear_table(self.factories, self.center, self.bag, self.box))
+        uniforms = np.fromiter(iter(self.rng.random, None), dtype=np.float64, count=n)
+        kernels.deal(self.factories, self.bag, self.box, uniforms, TILES_PER_FACTORY)
+        self._tiles_dealt = n
+
+    def step(self, action):
+        self.step_observed(action)
+        return self.get_global_state()
+
+    def step_observed(self, action, prev_obs=None):
+        """
+        step() that also returns the env observation of the new state,
+        patched from `prev_obs` (the one before the move) in the same kernel
+        call. Returns None when `prev_obs` is None or the move ended the
+        round; the caller then builds the observation itself.
+        """
+        source_idx, color, target_row = action
+        # The kernels don't bounds-check
+        if not (-1 <= source_idx < self.num_factories and 1 <= color <= 5 and -1 <= target_row < GRID_SIZE):
+            raise IndexError(f"Action out of range: {action}")
+        mover = self.current_player_idx
+        player = self.players[mover]
+        self.version += 1
+
+        takes_token = source_idx == -1 and self.first_player_token_available
+        obs = None
+        if prev_obs is None:
+            player.floor_line_count, status = kernels.apply_move(
+                self.factories, self.center, player.wall, player.pattern_lines_color,
+                player.pattern_lines_count, player.floor_line, player.floor_line_count,
+                source_idx, color, target_row, takes_token)
+        else:
+            # The token as an int: Numba is noticeably slower to type a bool
+            player.floor_line_count, status, obs = kernels.move_observation(
+                self.factories, self.center, player.cells, player.floor_line_count,
+                source_idx, color, target_row, int(self.first_player_token_available),
+                mover, self.num_players, prev_obs)
+        if status == -1:
+            where = "center" if source_idx == -1 else "factory"
+            raise ValueError(f"Move Invalid: Color not in {where}.")
+
+        if takes_token:
+            self.first_player_token_available = False
+            self.current_start_player = mover
+        self.turn_in_round += 1
+
+        if status == 1:
+            self._end_round_processing()
+            if not self.is_game_over():
+                self.start_new_round()
+            return None
+        self.current_player_idx = (mover + 1) % self.num_players
+        return obs
+
+    def _is_round_empty(self):
+        return kernels.round_is_empty(self.factories, self.center)
+
+    def _end_round_processing(self):
+        # As AzulGame's, with the discards scored straight into the box
+        full_row = False
+        for i, p in enumerate(self.players):
+            placed = [] if self._subscribers else None
+            _, penalty, completed = p.score_round(self.box, placed)
+            full_row = full_row or completed
+            if placed is not None:
+                self._emit_round_events(i, p, placed, penalty)
+        self._full_row = full_row
+
+    def is_game_over(self):
+        # Asked before and after every env step. The out-of-tiles check is
+        # AzulGame._out_of_tiles on the deal's tile count
+        if self._full_row is None:
+            self._full_row = any([kernels.has_full_row(p.wall) for p in self.players])
+        return self._full_row or (self.turn_in_round == 0 and self._tiles_dealt == 0)
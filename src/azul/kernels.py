@@ -0,0 +1,513 @@
+"""
+Engine hot paths as scalar loops over plain arrays, compiled with Numba
+when it is installed. Without Numba they still run (as slow pure Python);
+`backends.resolve_backend` picks the NumPy engine instead in that case.
+
+Array layout is the engine's own: wall (5, 5), pattern line colors/counts
+(5,), floor (7,), factories (F, 6), center / bag / box (6,) indexed by
+color id.
+"""
+import numpy as np
+
+from .constants import (
+    GRID_SIZE, FLOOR_LINE_CAPACITY, FLOOR_PENALTY_TOTAL, FIRST_PLAYER_TOKEN, WALL_COLUMN,
+    TILES_PER_FACTORY
+)
+
+try:
+    import numba
+    HAVE_NUMBA = True
+    prange = numba.prange
+except ImportError:
+    HAVE_NUMBA = False
+    prange = range
+
+
+def _jit(fn):
+    return numba.njit(cache=True)(fn) if HAVE_NUMBA else fn
+
+
+def _jit_parallel(fn):
+    return numba.njit(cache=True, parallel=True)(fn) if HAVE_NUMBA else fn
+
+
+_WALL_COLUMN = np.ascontiguousarray(WALL_COLUMN, dtype=np.int64)
+_FLOOR_PENALTY = np.array(FLOOR_PENALTY_TOTAL, dtype=np.int64)
+_NUM_COLORS = 5
+_NUM_DESTS = GRID_SIZE + 1
+
+
+# --- BOARD ---
+@_jit
+def placement_score(wall, row, col):
+    """Adjacency points for a tile just placed at (row, col)."""
+    horiz = 0
+    c = col - 1
+    while c >= 0 and wall[row, c] != 0:
+        horiz += 1
+        c -= 1
+    c = col + 1
+    while c < GRID_SIZE and wall[row, c] != 0:
+        horiz += 1
+        c += 1
+    if horiz > 0:
+        horiz += 1
+
+    vert = 0
+    r = row - 1
+    while r >= 0 and wall[r, col] != 0:
+        vert += 1
+        r -= 1
+    r = row + 1
+    while r < GRID_SIZE and wall[r, col] != 0:
+        vert += 1
+        r += 1
+    if vert > 0:
+        vert += 1
+
+    if horiz == 0 and vert == 0:
+        return 1
+    return horiz + vert
+
+
+@_jit
+def can_add(wall, line_color, line_count, row, color):
+    if wall[row, _WALL_COLUMN[row, color - 1]] != 0:
+        return False
+    if line_count[row] >= row + 1:
+        return False
+    return line_color[row] == 0 or line_color[row] == color
+
+
+@_jit
+def placeable_mask(wall, line_color, line_count, out):
+    """Fills out[row, color_idx] with can_add for every pair."""
+    for row in range(GRID_SIZE):
+        for c in range(_NUM_COLORS):
+            out[row, c] = can_add(wall, line_color, line_count, row, c + 1)
+
+
+@_jit
+def add_to_floor(floor, floor_count, color, count):
+    """Returns the new floor count; tiles beyond capacity are lost."""
+    end = min(floor_count + count, FLOOR_LINE_CAPACITY)
+    for i in range(floor_count, end):
+        floor[i] = color
+    return end
+
+
+@_jit
+def place_tiles(wall, line_color, line_count, floor, floor_count, row, color, count):
+    """
+    AzulGame.step's placement: onto pattern line `row` with overflow to the
+    floor, or all to the floor if row is -1 or the line can't take `color`.
+    Returns the new floor count.
+    """
+    if row == -1 or not can_add(wall, line_color, line_count, row, color):
+        return add_to_floor(floor, floor_count, color, count)
+    line_color[row] = color
+    space = row + 1 - line_count[row]
+    placed = min(count, space)
+    line_count[row] += placed
+    return add_to_floor(floor, floor_count, color, count - placed)
+
+
+@_jit
+def round_bonuses(wall, line_color, line_count, floor, floor_count, discards, row_points):
+    """
+    Moves full pattern lines to the wall, clears the floor and adds the
+    returned tiles to discards. row_points[row] gets each placement's points
+    (-1 if the row was not full). Returns (points incl. penalty, penalty,
+    whether a wall row is now complete).
+    """
+    points = 0
+    for row in range(GRID_SIZE):
+        row_points[row] = -1
+        if line_count[row] == row + 1:
+            color = line_color[row]
+            col = _WALL_COLUMN[row, color - 1]
+            wall[row, col] = color
+            pts = placement_score(wall, row, col)
+            row_points[row] = pts
+            points += pts
+            discards[color] += row
+            line_count[row] = 0
+            line_color[row] = 0
+
+    penalty = _FLOOR_PENALTY[floor_count]
+    for i in range(floor_count):
+        tile = floor[i]
+        if 1 <= tile <= _NUM_COLORS:
+            discards[tile] += 1
+        floor[i] = 0
+    return points + penalty, penalty, has_full_row(wall)
+
+
+@_jit
+def end_game_bonus(wall):
+    bonus = 0
+    for r in range(GRID_SIZE):
+        full = True
+        for c in range(GRID_SIZE):
+            if wall[r, c] == 0:
+                full = False
+        if full:
+            bonus += 2
+    for c in range(GRID_SIZE):
+        full = True
+        for r in range(GRID_SIZE):
+            if wall[r, c] == 0:
+                full = False
+        if full:
+            bonus += 7
+    for color in range(1, _NUM_COLORS + 1):
+        n = 0
+        for r in range(GRID_SIZE):
+            if wall[r, _WALL_COLUMN[r, color - 1]] == color:
+                n += 1
+        if n == GRID_SIZE:
+            bonus += 10
+    return bonus
+
+
+@_jit
+def virtual_score(wall, line_color, line_count, floor_count, score):
+    """PlayerBoard.get_complete_virtual_score on a scratch copy of the wall."""
+    v_wall = wall.copy()
+    v_score = score
+    for row in range(GRID_SIZE):
+        if line_count[row] == row + 1:
+            color = line_color[row]
+            col = _WALL_COLUMN[row, color - 1]
+            v_wall[row, col] = color
+            v_score += placement_score(v_wall, row, col)
+    v_score += _FLOOR_PENALTY[floor_count]
+    if v_score < 0:
+        v_score = 0
+    return v_score + end_game_bonus(v_wall)
+
+
+@_jit
+def has_full_row(wall):
+    for r in range(GRID_SIZE):
+        full = True
+        for c in range(GRID_SIZE):
+            if wall[r, c] == 0:
+                full = False
+        if full:
+            return True
+    return False
+
+
+# --- GAME ---
+@_jit
+def take_tiles(factories, center, source, color):
+    """Removes `color` from a factory (remainder to the center) or the center (-1)."""
+    if source == -1:
+        count = center[color]
+        center[color] = 0
+        return count
+    count = factories[source, color]
+    factories[source, color] = 0
+    for c in range(1, _NUM_COLORS + 1):
+        center[c] += factories[source, c]
+        factories[source, c] = 0
+    return count
+
+
+@_jit
+def round_is_empty(factories, center):
+    for c in range(1, _NUM_COLORS + 1):
+        if center[c] != 0:
+            return False
+    for f in range(factories.shape[0]):
+        for c in range(1, _NUM_COLORS + 1):
+            if factories[f, c] != 0:
+                return False
+    return True
+
+
+@_jit
+def apply_move(factories, center, wall, line_color, line_count, floor, floor_count,
+               source, color, row, takes_token):
+    """
+    One AzulGame.step in a single call: take the tiles, put the first player
+    token (if `takes_token`) and then the tiles on the board. Returns
+    (new floor count, status): status is 1 if that emptied the factories and
+    center, 0 otherwise, and -1 (with nothing changed) if the source has no
+    tile of that color.
+    """
+    available = center[color] if source == -1 else factories[source, color]
+    if available == 0:
+        return floor_count, -1
+    count = take_tiles(factories, center, source, color)
+    if takes_token:
+        floor_count = add_to_floor(floor, floor_count, FIRST_PLAYER_TOKEN, 1)
+    floor_count = place_tiles(wall, line_color, line_count, floor, floor_count, row, color, count)
+    return floor_count, 1 if round_is_empty(factories, center) else 0
+
+
+@_jit
+def clear_table(factories, center, bag, box):
+    """Empties the factories and center for a deal; returns the tiles left to draw (bag plus box)."""
+    factories[:] = 0
+    center[:] = 0
+    total = 0
+    for c in range(1, _NUM_COLORS + 1):
+        total += bag[c] + box[c]
+    return total
+
+
+@_jit
+def deal(factories, bag, box, uniforms, tiles_per_factory):
+    """
+    Fills the factories one tile per uniform, refilling the bag from the box
+    when it runs dry. Each draw bisects u * bag total into the running bag
+    counts, exactly like random.choices, so the same uniforms give the same
+    deal as the NumPy engine.
+    """
+    k = 0
+    for f in range(factories.shape[0]):
+        for _ in range(tiles_per_factory):
+            if k == uniforms.shape[0]:
+                return
+            total = 0
+            for c in range(1, _NUM_COLORS + 1):
+                total += bag[c]
+            if total == 0:
+                for c in range(1, _NUM_COLORS + 1):
+                    bag[c] = box[c]
+                    total += box[c]
+                    box[c] = 0
+            x = uniforms[k] * float(total)
+            k += 1
+            idx = 0
+            running = bag[1]
+            while idx < _NUM_COLORS - 1 and running <= x:
+                idx += 1
+                running += bag[idx + 1]
+            bag[idx + 1] -= 1
+            factories[f, idx + 1] += 1
+
+
+@_jit
+def action_mask(factories, center, wall, line_color, line_count, out):
+    """The env's flat (source, color, dest) legality mask for the player to move."""
+    num_factories = factories.shape[0]
+    for s in range(num_factories + 1):
+        for c in range(_NUM_COLORS):
+            base = (s * _NUM_COLORS + c) * _NUM_DESTS
+            if s == num_factories:
+                available = center[c + 1] > 0
+            else:
+                available = factories[s, c + 1] > 0
+            for d in range(GRID_SIZE):
+                out[base + d] = available and can_add(wall, line_color, line_count, d, c + 1)
+            out[base + GRID_SIZE] = available
+
+
+@_jit
+def observation_frame(factories, center, current, num_players, token, out):
+    """
+    The env observation around the boards: factories then center (all 6
+    slots each) at the start of `out`, the one-hot player to move and the
+    start token at the end. Returns the offset of the first board.
+    """
+    k = 0
+    for f in range(factories.shape[0]):
+        for c in range(factories.shape[1]):
+            out[k] = factories[f, c]
+            k += 1
+    for c in range(center.shape[0]):
+        out[k] = center[c]
+        k += 1
+    end = out.shape[0] - 1
+    for i in range(num_players):
+        out[end - num_players + i] = 1.0 if i == current else 0.0
+    out[end] = 1.0 if token else 0.0
+    return k
+
+
+@_jit
+def board_cells(cells):
+    """(wall, pattern line colors, pattern line counts, floor) views of a packed board."""
+    n = GRID_SIZE * GRID_SIZE
+    return (cells[:n].reshape((GRID_SIZE, GRID_SIZE)), cells[n:n + GRID_SIZE],
+            cells[n + GRID_SIZE:n + 2 * GRID_SIZE], cells[n + 2 * GRID_SIZE:])
+
+
+@_jit
+def board_observation(cells, out, offset):
+    """A packed board (PlayerBoard.get_state_vector's layout) copied into out[offset:]; returns the offset after."""
+    for i in range(cells.shape[0]):
+        out[offset + i] = cells[i]
+    return offset + cells.shape[0]
+
+
+@_jit
+def move_observation(factories, center, cells, floor_count, source, color, row, token,
+                     player, num_players, prev_obs):
+    """
+    apply_move for `player`, whose board is packed in `cells` (`token`: the
+    start token is still in the center), plus the env observation of the
+    new state when the move leaves tiles on the table (status 0): a copy of
+    `prev_obs`, the observation before the move, with everything but the
+    other boards rewritten. Returns (floor count, status, observation); for
+    any other status the observation is incomplete.
+    """
+    obs = prev_obs.copy()
+    wall, line_color, line_count, floor = board_cells(cells)
+    takes_token = source == -1 and token
+    floor_count, status = apply_move(factories, center, wall, line_color, line_count, floor,
+                                     floor_count, source, color, row, takes_token)
+    if status != 0:
+        return floor_count, status, obs
+    offset = observation_frame(factories, center, (player + 1) % num_players, num_players,
+                               token and not takes_token, obs)
+    board_observation(cells, obs, offset + player * cells.shape[0])
+    return floor_count, status, obs
+
+
+# --- PLAYOUTS ---
+@_jit
+def _uniform(state):
+    """Next float in [0, 1) from the splitmix64 stream held in state[0]."""
+    state[0] += np.uint64(0x9E3779B97F4A7C15)
+    z = state[0]
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return float(z >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+
+@_jit
+def _greedy_value(wall, line_color, line_count, floor_count, score, row, color, count,
+                  takes_token, scratch_color, scratch_count):
+    """The mover's virtual score after a move, as GreedyPolicy rates it."""
+    scratch_color[:] = line_color
+    scratch_count[:] = line_count
+    if takes_token:
+        floor_count = min(floor_count + 1, FLOOR_LINE_CAPACITY)
+    if row < GRID_SIZE and can_add(wall, scratch_color, scratch_count, row, color):
+        placed = min(count, row + 1 - scratch_count[row])
+        scratch_color[row] = color
+        scratch_count[row] += placed
+        count -= placed
+    floor_count = min(floor_count + count, FLOOR_LINE_CAPACITY)
+    return virtual_score(wall, scratch_color, scratch_count, floor_count, score)
+
+
+@_jit
+def _choose_move(factories, center, wall, line_color, line_count, floor_count, score,
+                 token, greedy, state, scratch_color, scratch_count):
+    """
+    (source index, color, dest) over the env's legal actions, with the
+    center as source F and the floor as dest GRID_SIZE: uniformly random,
+    or (greedy) the best virtual score with ties broken uniformly.
+    """
+    num_factories = factories.shape[0]
+    best = -1
+    ties = 0
+    chosen_s, chosen_c, chosen_d = -1, -1, -1
+    for s in range(num_factories + 1):
+        for c in range(1, _NUM_COLORS + 1):
+            count = center[c] if s == num_factories else factories[s, c]
+            if count == 0:
+                continue
+            for d in range(_NUM_DESTS):
+                if d < GRID_SIZE and not can_add(wall, line_color, line_count, d, c):
+                    continue
+                value = 0
+                if greedy:
+                    takes_token = token and s == num_factories
+                    value = _greedy_value(wall, line_color, line_count, floor_count, score,
+                                          d, c, count, takes_token, scratch_color, scratch_count)
+                if value > best:
+                    best = value
+                    ties = 1
+                    chosen_s, chosen_c, chosen_d = s, c, d
+                elif value == best:
+                    # Reservoir sampling: each tied move ends up chosen with p = 1/ties
+                    ties += 1
+                    if _uniform(state) * ties < 1.0:
+                        chosen_s, chosen_c, chosen_d = s, c, d
+    return chosen_s, chosen_c, chosen_d
+
+
+@_jit
+def _playout(factories, center, walls, line_colors, line_counts, floors, floor_counts, scores,
+             bag, box, token, current, start_player, greedy, max_rounds, state):
+    """
+    Plays a position to the end in place, end-game bonuses included. After
+    `max_rounds` more rounds (or if no tiles are left to deal) the game is
+    scored as it stands: tiles nobody can place would otherwise cycle
+    through the floor and the box forever.
+    """
+    num_players = walls.shape[0]
+    num_factories = factories.shape[0]
+    uniforms = np.empty(num_factories * TILES_PER_FACTORY)
+    row_points = np.empty(GRID_SIZE, dtype=np.int64)
+    scratch_color = np.empty(GRID_SIZE, dtype=line_colors.dtype)
+    scratch_count = np.empty(GRID_SIZE, dtype=line_counts.dtype)
+    rounds = 0
+    while True:
+        p = current
+        s, c, d = _choose_move(factories, center, walls[p], line_colors[p], line_counts[p],
+                               floor_counts[p], scores[p], token, greedy, state,
+                               scratch_color, scratch_count)
+        source = -1 if s == num_factories else s
+        row = -1 if d == GRID_SIZE else d
+        takes_token = source == -1 and token
+        floor_counts[p], status = apply_move(factories, center, walls[p], line_colors[p],
+                                             line_counts[p], floors[p], floor_counts[p],
+                                             source, c, row, takes_token)
+        if takes_token:
+            token = False
+            start_player = p
+        if status == 0:
+            current = (current + 1) % num_players
+            continue
+
+        rounds += 1
+        over = rounds >= max_rounds
+        for q in range(num_players):
+            points, _, full_row = round_bonuses(walls[q], line_colors[q], line_counts[q], floors[q],
+                                                floor_counts[q], box, row_points)
+            floor_counts[q] = 0
+            scores[q] = max(scores[q] + points, 0)
+            if full_row:
+                over = True
+        if over:
+            for q in range(num_players):
+                scores[q] += end_game_bonus(walls[q])
+            return
+
+        current = start_player
+        token = True
+        n = min(num_factories * TILES_PER_FACTORY, int(bag.sum() + box.sum()))
+        for k in range(n):
+            uniforms[k] = _uniform(state)
+        deal(factories, bag, box, uniforms[:n], TILES_PER_FACTORY)
+        if n == 0:
+            for q in range(num_players):
+                scores[q] += end_game_bonus(walls[q])
+            return
+
+
+@_jit_parallel
+def playouts(factories, center, walls, line_colors, line_counts, floors, floor_counts, scores,
+             bag, box, token, current, start_player, greedy, max_rounds, seeds, out):
+    """
+    Plays len(seeds) copies of one position to the end, in parallel, and
+    writes each copy's final scores to out[i]. Copy i draws its tiles from
+    its own stream seeded with seeds[i], so results don't depend on the
+    number of threads.
+    """
+    for i in prange(seeds.shape[0]):
+        state = np.empty(1, dtype=np.uint64)
+        state[0] = seeds[i]
+        final = scores.copy()
+        _playout(factories.copy(), center.copy(), walls.copy(), line_colors.copy(),
+                 line_counts.copy(), floors.copy(), floor_counts.copy(), final,
+                 bag.copy(), box.copy(), token, current, start_player, greedy, max_rounds, state)
+        out[i, :] = final
@@ -0,0 +1,39 @@
+import sys
+import os
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.policies import load_policy
+from src.agent.start_positions import StartPositionPool
+
+# --- CONFIGURATION ---
+OUTPUT_PATH = "models/start_pool.npz"
+DEFAULT_ROUNDS = (3, 4, 5)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a pool of mid-game round-start positions")
+    parser.add_argument("--policy", default="greedy", help="'random', 'greedy' or a checkpoint .zip")
+    parser.add_argument("--replay", help="Directory of games recorded by src/analytics.py --record")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, nargs="+", default=list(DEFAULT_ROUNDS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    if args.replay:
+        print(f"Snapshotting recorded games in {args.replay}...")
+        pool = StartPositionPool.from_recorded(args.replay, rounds=args.rounds)
+    else:
+        print(f"Snapshotting {args.games} self-play games ({args.policy})...")
+        pool = StartPositionPool.from_self_play(load_policy(args.policy), args.games,
+                                                rounds=args.rounds, seed=args.seed)
+
+    pool.save(args.out)
+    counts = {int(r): int(c) for r, c in zip(*np.unique(pool.rounds, return_counts=True))}
+    print(f"Saved {len(pool)} positions ({pool.states.nbytes / 1024:.0f} KB) to {args.out}")
+    print(f"Positions per round: {counts}")
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,28 @@ from sb3_contrib import MaskablePPO
 from sb3_contrib.common.maskable.utils import get_action_masks
 from sb3_contrib.common.wrappers import ActionMasker
 from stable_baselines3.common.vec_env import DummyVecEnv
-from stable_baselines3.common.callbacks import CheckpointCallback
 from stable_baselines3.common.monitor import Monitor 
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.agent.rl_env import AzulEnv
+from src.agent.checkpoints import CheckpointManager, load_checkpoint
+from src.agent.eval_callback import BackgroundEvaluator
 
 # --- CONFIG ---
 LOAD_MODEL_PATH = "models/ppo_azul_big_20M/azul_20M_final.zip" 
 NEW_TOTAL_TIMESTEPS = 100000 
 MODELS_DIR = "models/ppo_azul_big_20M_test"
 LOGS_DIR = "logs"
+EVAL_GAMES = 100         # Seeded games per opponent for each checkpoint
+EVAL_WORKERS = 2         # Background evaluation processes
+ENGINE_BACKEND = "auto"  # Compiled engine when Numba is installed (src/azul/backends.py)
 
 def mask_fn(env: gym.Env):
     return env.unwrapped.action_masks()
 
 def make_env():
-    env = AzulEnv(num_players=2) 
+    env = AzulEnv(num_players=2, backend=ENGINE_BACKEND)
     env = Monitor(env) 
     env = ActionMasker(env, mask_fn) 
     return env 
@@ -37,7 +41,9 @@ def continue_training():
     print(f"Loading model from: {LOAD_MODEL_PATH}")
     # We don't need to specify policy_kwargs or architecture here, 
     # because .load() reads them from the zip file automatically!
-    model = MaskablePPO.load(LOAD_MODEL_PATH, env=env, tensorboard_log=LOGS_DIR)
+    # If the checkpoint came from CheckpointManager, the matching _state.pkl
+    # also restores RNGs and the in-progress games for an exact resume.
+    model = load_checkpoint(MaskablePPO, LOAD_MODEL_PATH, env, tensorboard_log=LOGS_DIR)
 
     print("\n" + "="*40)
     print("RESUMING TRAINING")
@@ -45,10 +51,20 @@ def continue_training():
     print("="*40 + "\n")
     
     # 3. Callbacks
-    checkpoint_callback = CheckpointCallback(
+    checkpoint_callback = CheckpointManager(
         save_freq=50000,
         save_path=MODELS_DIR,
-        name_prefix="azul_20M"
+        name_prefix="azul_20M",
+        keep_last=3,
+        keep_best=3
+    )
+
+    # Plays each checkpoint against random/greedy and the previous two in
+    # background processes; results go to TensorBoard under eval/
+    eval_callback = BackgroundEvaluator(
+        checkpoint_callback,
+        num_games=EVAL_GAMES,
+        workers=EVAL_WORKERS
     )
 
     # 4. Train
@@ -56,7 +72,7 @@ def continue_training():
     # instead of starting back at 0 on the X-axis.
     model.learn(
         total_timesteps=NEW_TOTAL_TIMESTEPS, 
-        callback=checkpoint_callback,
+        callback=[checkpoint_callback, eval_callback],
         progress_bar=True,
         reset_num_timesteps=False 
     )
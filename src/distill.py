@@ -0,0 +1,227 @@
+import sys
+import os
+import argparse
+import time
+
+import numpy as np
+import torch as th
+from sb3_contrib import MaskablePPO
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.core_env import AzulCoreEnv
+from src.agent.rl_env import AzulEnv
+from src.agent.eval_cache import policy_forward
+from src.agent.evaluation import play_match
+from src.agent.policies import ModelPolicy
+
+# --- CONFIGURATION ---
+TEACHER_PATH = "models/ppo_azul_big_1M/azul_1M_final.zip"
+OUTPUT_DIR = "models/distilled"
+NUM_PLAYERS = 2
+STUDENT_ARCHS = ("128x128", "64x64", "32")
+NUM_POSITIONS = 100_000
+PARALLEL_GAMES = 256      # Games advanced in lockstep; one teacher pass labels them all
+EXPLORE_PROB = 0.1        # Chance of a uniformly random move, so students see off-policy positions
+VAL_FRACTION = 0.05
+EPOCHS = 10
+BATCH_SIZE = 1024
+LEARNING_RATE = 1e-3
+VALUE_COEF = 0.5
+MATCH_GAMES = 200
+LATENCY_REPEATS = 300
+HUGE_NEG = -1e8           # Logit for illegal actions, as in sb3_contrib's masking
+
+
+# --- TEACHER DATA ---
+def generate_dataset(teacher, num_positions, seed=0):
+    """
+    Plays the teacher against itself (sampling its masked distribution, with
+    EXPLORE_PROB random moves) and records every position it sees together
+    with its action probabilities and value.
+    """
+    rng = np.random.default_rng(seed)
+    envs = [AzulCoreEnv(num_players=NUM_PLAYERS) for _ in range(PARALLEL_GAMES)]
+    for i, env in enumerate(envs):
+        env.reset(seed=seed + i)
+    next_seed = seed + len(envs)
+
+    obs_rows, mask_rows, prob_rows, value_rows = [], [], [], []
+    collected = 0
+    while collected < num_positions:
+        obs = np.stack([env._get_obs() for env in envs])
+        masks = np.stack([env.action_masks() for env in envs])
+        probs, values = policy_forward(teacher, obs, masks)
+        obs_rows.append(obs)
+        mask_rows.append(masks)
+        prob_rows.append(probs.astype(np.float32))
+        value_rows.append(values.astype(np.float32))
+        collected += len(envs)
+
+        for env, p, mask in zip(envs, probs, masks):
+            if rng.random() < EXPLORE_PROB:
+                action = rng.choice(np.flatnonzero(mask))
+            else:
+                p = p.astype(np.float64)
+                action = rng.choice(len(p), p=p / p.sum())
+            _, _, terminated, truncated, _ = env.step(int(action))
+            if terminated or truncated:
+                env.reset(seed=next_seed)
+                next_seed += 1
+
+    data = {
+        "obs": np.concatenate(obs_rows)[:num_positions],
+        "masks": np.concatenate(mask_rows)[:num_positions],
+        "probs": np.concatenate(prob_rows)[:num_positions],
+        "values": np.concatenate(value_rows)[:num_positions],
+    }
+    return data
+
+
+def load_or_generate(teacher, path, num_positions, seed):
+    if path and os.path.exists(path):
+        with np.load(path) as f:
+            data = {k: f[k] for k in f.files}
+        print(f"Loaded {len(data['obs'])} labelled positions from {path}")
+        return data
+    start = time.time()
+    data = generate_dataset(teacher, num_positions, seed)
+    print(f"Labelled {len(data['obs'])} positions in {time.time() - start:.1f}s")
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, **data)
+    return data
+
+
+# --- STUDENT TRAINING ---
+def make_student(arch, seed):
+    policy_kwargs = dict(activation_fn=th.nn.Tanh, net_arch=dict(pi=list(arch), vf=list(arch)))
+    return MaskablePPO("MlpPolicy", AzulEnv(num_players=NUM_PLAYERS), policy_kwargs=policy_kwargs,
+                       seed=seed, device="cpu")
+
+
+def student_forward(policy, obs, masks):
+    """Differentiable masked log-probabilities and values of an SB3 policy."""
+    features = policy.extract_features(obs)
+    latent_pi, latent_vf = policy.mlp_extractor(features)
+    logits = policy.action_net(latent_pi).masked_fill(~masks, HUGE_NEG)
+    return th.log_softmax(logits, dim=1), policy.value_net(latent_vf).squeeze(1)
+
+
+def distill_losses(policy, obs, masks, probs, values, value_scale):
+    """Masked KL(teacher || student) and standardised value MSE."""
+    log_student, student_values = student_forward(policy, obs, masks)
+    log_teacher = th.log(probs.clamp_min(1e-12))
+    kl = th.where(probs > 0, probs * (log_teacher - log_student), th.zeros_like(probs)).sum(dim=1)
+    value_mse = ((student_values - values) / value_scale).pow(2)
+    return kl.mean(), value_mse.mean(), log_student
+
+
+def evaluate_student(policy, data, value_scale):
+    with th.no_grad():
+        kl, value_mse, log_student = distill_losses(policy, *data, value_scale)
+    agreement = (log_student.argmax(dim=1) == data[2].argmax(dim=1)).float().mean()
+    return float(kl), float(value_mse), float(agreement)
+
+
+def train_student(student, train, val, epochs, seed):
+    policy = student.policy
+    policy.set_training_mode(True)
+    optimizer = th.optim.Adam(policy.parameters(), lr=LEARNING_RATE)
+    # Teacher values are in reward units; scale so the KL term dominates
+    value_scale = train[3].std().clamp_min(1e-6)
+    generator = th.Generator().manual_seed(seed)
+
+    n = len(train[0])
+    for epoch in range(epochs):
+        order = th.randperm(n, generator=generator)
+        for start in range(0, n, BATCH_SIZE):
+            idx = order[start:start + BATCH_SIZE]
+            kl, value_mse, _ = distill_losses(policy, *(t[idx] for t in train), value_scale)
+            loss = kl + VALUE_COEF * value_mse
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+        kl, value_mse, agreement = evaluate_student(policy, val, value_scale)
+        print(f"    epoch {epoch + 1:>2}: val KL {kl:.4f}  value MSE {value_mse:.4f}  agreement {agreement:.1%}")
+    policy.set_training_mode(False)
+    return evaluate_student(policy, val, value_scale)
+
+
+# --- REPORTING ---
+def measure_latency(model, obs, masks):
+    """Median single-position predict() time and per-position cost of a 64-batch, in us."""
+    single = []
+    for i in range(LATENCY_REPEATS):
+        j = i % len(obs)
+        start = time.perf_counter()
+        model.predict(obs[j], action_masks=masks[j], deterministic=True)
+        single.append(time.perf_counter() - start)
+    batched = []
+    for i in range(max(LATENCY_REPEATS // 10, 1)):
+        start = time.perf_counter()
+        policy_forward(model, obs[:64], masks[:64])
+        batched.append((time.perf_counter() - start) / len(obs[:64]))
+    return np.median(single) * 1e6, np.median(batched) * 1e6
+
+
+def count_params(model):
+    return sum(p.numel() for p in model.policy.parameters())
+
+
+def to_tensors(data, rows):
+    return (th.as_tensor(data["obs"][rows]), th.as_tensor(data["masks"][rows]),
+            th.as_tensor(data["probs"][rows]), th.as_tensor(data["values"][rows]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill a MaskablePPO teacher into smaller students")
+    parser.add_argument("--teacher", default=TEACHER_PATH)
+    parser.add_argument("--archs", nargs="+", default=list(STUDENT_ARCHS),
+                        help="Hidden layer sizes per student, e.g. 128x128 64x64 32")
+    parser.add_argument("--positions", type=int, default=NUM_POSITIONS)
+    parser.add_argument("--dataset", help="Reuse/save the labelled positions at this .npz path")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--games", type=int, default=MATCH_GAMES, help="Match games vs the teacher per student")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    print(f"Loading teacher from: {args.teacher}...")
+    teacher = MaskablePPO.load(args.teacher, device="cpu")
+    data = load_or_generate(teacher, args.dataset, args.positions, args.seed)
+
+    rows = np.random.default_rng(args.seed).permutation(len(data["obs"]))
+    n_val = max(int(len(rows) * VAL_FRACTION), 1)
+    val, train = to_tensors(data, rows[:n_val]), to_tensors(data, rows[n_val:])
+    val_obs, val_masks = data["obs"][rows[:n_val]], data["masks"][rows[:n_val]]
+
+    teacher_single, teacher_batched = measure_latency(teacher, val_obs, val_masks)
+    results = [("teacher", count_params(teacher), 0.0, 1.0, None, None, teacher_single, teacher_batched)]
+
+    os.makedirs(args.out, exist_ok=True)
+    for spec in args.archs:
+        arch = [int(x) for x in spec.split("x")]
+        print(f"\n--- STUDENT {spec} ---")
+        student = make_student(arch, args.seed)
+        kl, _, agreement = train_student(student, train, val, args.epochs, args.seed)
+        path = os.path.join(args.out, f"student_{spec}.zip")
+        student.save(path)
+
+        match = play_match(ModelPolicy(student), ModelPolicy(teacher), args.games, seed=args.seed)
+        single, batched = measure_latency(student, val_obs, val_masks)
+        print(f"    saved {path}; vs teacher: win rate {match['win_rate']:.1%}, margin {match['margin']:+.1f}")
+        results.append((spec, count_params(student), kl, agreement, match["win_rate"], match["margin"],
+                        single, batched))
+
+    print(f"\n{'net':<10}{'params':>10}{'val KL':>9}{'agree':>8}{'win vs T':>10}{'margin':>8}"
+          f"{'predict':>11}{'batch/pos':>11}")
+    for name, params, kl, agreement, win, margin, single, batched in results:
+        win_s = f"{win:.1%}" if win is not None else "-"
+        margin_s = f"{margin:+.1f}" if margin is not None else "-"
+        print(f"{name:<10}{params:>10,}{kl:>9.4f}{agreement:>8.1%}{win_s:>10}{margin_s:>8}"
+              f"{single:>9.0f}us{batched:>9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import sys
+import os
+import argparse
+import importlib
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.core_env import AzulCoreEnv, NUM_DESTS, FLOOR_DEST
+from src.azul.constants import PLAYABLE_COLORS
+
+# --- CONFIGURATION ---
+REFERENCE = "src.azul.game:AzulGame"
+GAMES_PER_TASK = 200
+MAX_STEPS = 500           # Safety net against engines that never finish
+
+# Worker-side state, set up once per process by _worker_init
+_REF = None
+_CAND = None
+_ENVS = None
+
+
+def load_factory(spec):
+    """`module:attr` where attr is a game class or a callable(num_players, seed)."""
+    module_name, attr = spec.split(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def make_envs(num_players, cand_factory):
+    """
+    (reference env, candidate env): masks of each engine come from an env on
+    its own backend, so the candidate's mask kernel is fuzzed too. The NumPy
+    reference env decides which moves are legal.
+    """
+    from src.azul.jit_game import JitAzulGame
+    cand_backend = "jit" if isinstance(cand_factory(num_players, 0), JitAzulGame) else "numpy"
+    return (AzulCoreEnv(num_players=num_players, backend="numpy"),
+            AzulCoreEnv(num_players=num_players, backend=cand_backend))
+
+
+def game_state(game, env):
+    """Everything the rules touch, normalised so different backends compare."""
+    state = {
+        "factories": np.asarray(game.factories)[:, 1:6],
+        "center": np.asarray(game.center)[1:6],
+        "bag": np.array([game.bag[c] for c in PLAYABLE_COLORS]),
+        "box": np.array([game.box[c] for c in PLAYABLE_COLORS]),
+        "current_player": game.current_player_idx,
+        "start_player": game.current_start_player,
+        "first_player_token": bool(game.first_player_token_available),
+        "round": game.round_number,
+        "mask": env.action_masks(game),
+    }
+    for i, p in enumerate(game.players):
+        state[f"p{i}.score"] = int(p.score)
+        state[f"p{i}.wall"] = np.asarray(p.wall)
+        state[f"p{i}.pattern_color"] = np.asarray(p.pattern_lines_color)
+        state[f"p{i}.pattern_count"] = np.asarray(p.pattern_lines_count)
+        state[f"p{i}.floor"] = np.asarray(p.floor_line)
+        state[f"p{i}.floor_count"] = int(p.floor_line_count)
+    return state
+
+
+def diff_states(a, b):
+    return [k for k in a if not np.array_equal(a[k], b[k])]
+
+
+def _step(game, action):
+    """Applies one move; returns an error string instead of raising."""
+    try:
+        game.step(action)
+        if game.is_game_over():
+            game.apply_end_game_bonuses()
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def replay(ref_factory, cand_factory, envs, seed, actions):
+    """
+    Replays `actions` on both engines from `seed`, skipping any action that
+    is not legal in the reference at that point (so shrinking can drop
+    moves freely). Returns (applied_actions, fields) at the first
+    divergence, or None if both engines agree throughout.
+    """
+    env, cand_env = envs
+    ref = ref_factory(env.num_players, seed)
+    cand = cand_factory(env.num_players, seed)
+    a, b = game_state(ref, env), game_state(cand, cand_env)
+    applied = []
+    for action_idx in [None] + list(actions):
+        if action_idx is not None:
+            if ref.is_game_over() or not a["mask"][action_idx]:
+                continue
+            applied.append(action_idx)
+            action = env.to_game_action(action_idx)
+            err_ref, err_cand = _step(ref, action), _step(cand, action)
+            if err_ref != err_cand:
+                return applied, [f"exception: ref={err_ref} cand={err_cand}"]
+            a, b = game_state(ref, env), game_state(cand, cand_env)
+        fields = diff_states(a, b)
+        if fields:
+            return applied, fields
+    return None
+
+
+def fuzz_game(ref_factory, cand_factory, envs, seed):
+    """Plays one random-legal game in lockstep. Returns a failure dict or None."""
+    env, cand_env = envs
+    rng = np.random.default_rng(seed)
+    ref = ref_factory(env.num_players, seed)
+    cand = cand_factory(env.num_players, seed)
+    actions = []
+    a, b = game_state(ref, env), game_state(cand, cand_env)
+    while True:
+        fields = diff_states(a, b)
+        if fields:
+            return {"seed": seed, "actions": actions, "fields": fields}
+        if ref.is_game_over() or len(actions) >= MAX_STEPS or not a["mask"].any():
+            return None
+        action_idx = int(rng.choice(np.flatnonzero(a["mask"])))
+        actions.append(action_idx)
+        action = env.to_game_action(action_idx)
+        err_ref, err_cand = _step(ref, action), _step(cand, action)
+        if err_ref != err_cand:
+            return {"seed": seed, "actions": actions,
+                    "fields": [f"exception: ref={err_ref} cand={err_cand}"]}
+        a, b = game_state(ref, env), game_state(cand, cand_env)
+
+
+def shrink(ref_factory, cand_factory, envs, seed, actions):
+    """
+    Delta-debugging style minimisation: repeatedly drop chunks (then single
+    actions) while the replay still diverges, then reroute the remaining
+    moves to the floor where possible. Returns (actions, fields).
+    """
+    result = replay(ref_factory, cand_factory, envs, seed, actions)
+    if result is None:
+        return actions, []
+    actions, fields = result
+
+    chunk = max(len(actions) // 2, 1)
+    while chunk >= 1:
+        i = 0
+        changed = False
+        while i < len(actions):
+            result = replay(ref_factory, cand_factory, envs, seed, actions[:i] + actions[i + chunk:])
+            if result is not None and len(result[0]) < len(actions):
+                actions, fields = result
+                changed = True
+            else:
+                i += chunk
+        if not changed:
+            chunk //= 2
+
+    # A round only ends once every tile is taken, so most moves can't be
+    # dropped. Instead send them to the floor line where the bug survives,
+    # leaving only the pattern-line moves that matter.
+    for i, action in enumerate(actions):
+        to_floor = action - action % NUM_DESTS + FLOOR_DEST
+        if to_floor == action:
+            continue
+        result = replay(ref_factory, cand_factory, envs, seed, actions[:i] + [to_floor] + actions[i + 1:])
+        if result is not None and len(result[0]) <= len(actions):
+            actions, fields = result
+    return actions, fields
+
+
+def _as_factory(spec):
+    obj = load_factory(spec)
+    if isinstance(obj, type):
+        return lambda num_players, seed: obj(num_players, seed=seed)
+    return obj
+
+
+def _worker_init(ref_spec, cand_spec, num_players):
+    global _REF, _CAND, _ENVS
+    _REF = _as_factory(ref_spec)
+    _CAND = _as_factory(cand_spec)
+    _ENVS = make_envs(num_players, _CAND)
+
+
+def _run_task(seeds):
+    failures = []
+    for seed in seeds:
+        failure = fuzz_game(_REF, _CAND, _ENVS, int(seed))
+        if failure:
+            failures.append(failure)
+    return len(seeds), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential fuzzing of an engine backend against AzulGame")
+    parser.add_argument("candidate", help="module:attr of the candidate game class or factory(num_players, seed)")
+    parser.add_argument("--reference", default=REFERENCE)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-failures", type=int, default=1, help="Stop after this many diverging games")
+    args = parser.parse_args()
+
+    tasks = [np.arange(s, min(s + GAMES_PER_TASK, args.seed + args.games))
+             for s in range(args.seed, args.seed + args.games, GAMES_PER_TASK)]
+    done, failures = 0, []
+    start = time.time()
+    with Pool(args.workers, initializer=_worker_init,
+              initargs=(args.reference, args.candidate, args.players)) as pool:
+        for n, task_failures in pool.imap_unordered(_run_task, tasks):
+            done += n
+            failures.extend(task_failures)
+            if len(failures) >= args.max_failures:
+                pool.terminate()
+                break
+    elapsed = time.time() - start
+    print(f"{done:,} games in {elapsed:.1f}s ({done / max(elapsed, 1e-9):,.0f} games/s), "
+          f"{len(failures)} diverged")
+
+    if not failures:
+        return
+    ref, cand = _as_factory(args.reference), _as_factory(args.candidate)
+    envs = make_envs(args.players, cand)
+    env = envs[0]
+    for failure in failures[:args.max_failures]:
+        actions, fields = shrink(ref, cand, envs, failure["seed"], failure["actions"])
+        print(f"\nSeed {failure['seed']}: diverged after {len(failure['actions'])} moves "
+              f"on {', '.join(failure['fields'])}")
+        print(f"Minimal sequence ({len(actions)} moves): {actions}")
+        essential = [a for a in actions if a % NUM_DESTS != FLOOR_DEST]
+        print(f"  {len(essential)} pattern-line moves (source, color, row): "
+              + "; ".join(str(env.to_game_action(a)) for a in essential))
+        print(f"  mismatch after the last move: {', '.join(fields)}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,14 @@ import torch as th
 from sb3_contrib import MaskablePPO
 from sb3_contrib.common.wrappers import ActionMasker
 from stable_baselines3.common.vec_env import DummyVecEnv
-from stable_baselines3.common.callbacks import CheckpointCallback
 from stable_baselines3.common.monitor import Monitor 
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.agent.rl_env import AzulEnv
+from src.agent.checkpoints import CheckpointManager
+from src.agent.eval_callback import BackgroundEvaluator
+from src.agent.start_positions import StartPositionPool
 
 # --- CONFIGURATION ---
 MODELS_DIR = "models/coop_sparse"
@@ -20,6 +22,11 @@ TOTAL_TIMESTEPS = 5_000_000  # 5 Million Steps
 # Save a model every 50,000 steps. 
 # You will get: model_50000.zip, model_100000.zip, etc.
 SAVE_FREQ = 50_000 
+EVAL_GAMES = 100         # Seeded games per opponent for each checkpoint
+EVAL_WORKERS = 2         # Background evaluation processes
+START_POOL_PATH = None   # e.g. "models/start_pool.npz" from src/build_start_pool.py
+START_POOL_PROB = 0.5    # Fraction of episodes that start from a mid-game snapshot
+ENGINE_BACKEND = "auto"  # Compiled engine when Numba is installed (src/azul/backends.py)
 
 class CoopSparseAzulEnv(AzulEnv):
     def step(self, action_idx):
@@ -44,7 +51,9 @@ def mask_fn(env: gym.Env):
     return env.unwrapped.action_masks()
 
 def make_env():
-    env = CoopSparseAzulEnv(num_players=2) 
+    start_pool = StartPositionPool.load(START_POOL_PATH) if START_POOL_PATH else None
+    env = CoopSparseAzulEnv(num_players=2, start_pool=start_pool, start_pool_prob=START_POOL_PROB,
+                            backend=ENGINE_BACKEND) 
     env = Monitor(env) 
     env = ActionMasker(env, mask_fn) 
     return env 
@@ -76,15 +85,26 @@ def train():
 
     print(f"--- STARTING COOP SPARSE TRAINING (Target: {TOTAL_TIMESTEPS}) ---")
     
-    checkpoint_callback = CheckpointCallback(
+    # Saves in a background thread; keeps the 3 newest + 3 best checkpoints
+    checkpoint_callback = CheckpointManager(
         save_freq=SAVE_FREQ,
         save_path=MODELS_DIR,
-        name_prefix="coop_sparse"
+        name_prefix="coop_sparse",
+        keep_last=3,
+        keep_best=3
+    )
+
+    # Plays each checkpoint against random/greedy and the previous two in
+    # background processes; results go to TensorBoard under eval/
+    eval_callback = BackgroundEvaluator(
+        checkpoint_callback,
+        num_games=EVAL_GAMES,
+        workers=EVAL_WORKERS
     )
 
     model.learn(
         total_timesteps=TOTAL_TIMESTEPS, 
-        callback=checkpoint_callback,
+        callback=[checkpoint_callback, eval_callback],
         progress_bar=True
     )
     
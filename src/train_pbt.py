@@ -0,0 +1,221 @@
+import sys
+import os
+import json
+import random
+import gymnasium as gym
+import torch as th
+import torch.multiprocessing as mp
+from sb3_contrib import MaskablePPO
+from sb3_contrib.common.wrappers import ActionMasker
+from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.monitor import Monitor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.evaluation import play_match
+from src.agent.policies import ModelPolicy
+from src.train_coop_sparse import CoopSparseAzulEnv
+from src.train_coop_dense import CoopDenseAzulEnv
+from src.train_competitive_dense import KillerDenseAzulEnv
+
+# --- CONFIGURATION ---
+MODELS_DIR = "models/pbt"
+LOGS_DIR = "logs/pbt"
+POPULATION_SIZE = 4
+INTERVAL_STEPS = 100_000     # Training steps per member between exploit/explore rounds
+TOTAL_TIMESTEPS = 5_000_000  # Per member
+EVAL_GAMES = 20              # Games vs every other member per round
+EXPLOIT_FRACTION = 0.25      # Bottom quarter copies the top quarter
+PERTURB_FACTORS = (0.8, 1.25)
+SEED = 0
+ENGINE_BACKEND = "auto"      # Compiled engine when Numba is installed (src/azul/backends.py)
+
+REWARD_VARIANTS = {
+    "coop_sparse": CoopSparseAzulEnv,
+    "coop_dense": CoopDenseAzulEnv,
+    "killer_dense": KillerDenseAzulEnv,
+}
+
+# Initial search space (log-uniform for the first two)
+HPARAM_RANGES = {
+    "learning_rate": (1e-4, 1e-3),
+    "ent_coef": (1e-4, 3e-2),
+    "gamma": (0.95, 0.999),
+}
+
+POLICY_KWARGS = dict(
+    activation_fn=th.nn.Tanh,
+    net_arch=dict(pi=[256, 256], vf=[256, 256])
+)
+
+def mask_fn(env: gym.Env):
+    return env.unwrapped.action_masks()
+
+def make_vec_env(reward):
+    def make_env():
+        env = REWARD_VARIANTS[reward](num_players=2, backend=ENGINE_BACKEND)
+        env = Monitor(env)
+        env = ActionMasker(env, mask_fn)
+        return env
+    return DummyVecEnv([make_env])
+
+def build_model(hparams, tensorboard=False):
+    return MaskablePPO(
+        "MlpPolicy",
+        make_vec_env(hparams["reward"]),
+        verbose=0,
+        learning_rate=hparams["learning_rate"],
+        ent_coef=hparams["ent_coef"],
+        gamma=hparams["gamma"],
+        n_steps=2048,
+        batch_size=64,
+        tensorboard_log=LOGS_DIR if tensorboard else None,
+        device="cpu",
+        policy_kwargs=POLICY_KWARGS
+    )
+
+def sample_hparams(rng, member_idx):
+    lr_lo, lr_hi = HPARAM_RANGES["learning_rate"]
+    ent_lo, ent_hi = HPARAM_RANGES["ent_coef"]
+    return {
+        "learning_rate": lr_lo * (lr_hi / lr_lo) ** rng.random(),
+        "ent_coef": ent_lo * (ent_hi / ent_lo) ** rng.random(),
+        "gamma": rng.uniform(*HPARAM_RANGES["gamma"]),
+        # Spread the reward variants across the population
+        "reward": list(REWARD_VARIANTS)[member_idx % len(REWARD_VARIANTS)],
+    }
+
+def perturb_hparams(rng, hparams, reward):
+    new = dict(hparams, reward=reward)
+    new["learning_rate"] *= rng.choice(PERTURB_FACTORS)
+    new["ent_coef"] *= rng.choice(PERTURB_FACTORS)
+    # Perturb the horizon 1 / (1 - gamma) rather than gamma itself
+    horizon = 1.0 / (1.0 - hparams["gamma"]) * rng.choice(PERTURB_FACTORS)
+    new["gamma"] = min(max(1.0 - 1.0 / horizon, 0.9), 0.9999)
+    return new
+
+def apply_hparams(model, hparams):
+    model.learning_rate = hparams["learning_rate"]
+    model._setup_lr_schedule()
+    model.ent_coef = hparams["ent_coef"]
+    model.gamma = hparams["gamma"]
+    model.rollout_buffer.gamma = hparams["gamma"]
+
+# --- WORKER PROCESS ---
+def worker(member_idx, hparams, slots, conn):
+    """
+    Owns one learner. Weights are published to `slots[member_idx]` (shared
+    memory) after each interval so other members can read them for
+    evaluation and exploitation without going through the pipe.
+    """
+    th.set_num_threads(1)
+    model = build_model(hparams, tensorboard=True)
+    opponent = build_model(hparams)
+    my_slot = slots[member_idx]
+
+    def publish():
+        my_slot.copy_(th.nn.utils.parameters_to_vector(model.policy.parameters()).detach())
+
+    publish()
+    while True:
+        cmd, arg = conn.recv()
+        if cmd == "train":
+            model.learn(arg, reset_num_timesteps=False, tb_log_name=f"member_{member_idx}")
+            publish()
+            conn.send(model.num_timesteps)
+        elif cmd == "eval":
+            results = {}
+            for j, slot in enumerate(slots):
+                if j == member_idx:
+                    continue
+                th.nn.utils.vector_to_parameters(slot.clone(), opponent.policy.parameters())
+                results[j] = play_match(ModelPolicy(model), ModelPolicy(opponent), EVAL_GAMES, seed=arg)
+            conn.send(results)
+        elif cmd == "exploit":
+            donor_idx, new_hparams = arg
+            th.nn.utils.vector_to_parameters(slots[donor_idx].clone(), model.policy.parameters())
+            # Adam moments belong to the old weights
+            model.policy.optimizer.state.clear()
+            hparams = new_hparams
+            apply_hparams(model, hparams)
+            publish()
+            conn.send(True)
+        elif cmd == "save":
+            model.save(arg)
+            conn.send(True)
+        elif cmd == "stop":
+            conn.close()
+            return
+
+# --- COORDINATOR ---
+def broadcast(pipes, cmd, arg=None):
+    for conn in pipes:
+        conn.send((cmd, arg))
+    return [conn.recv() for conn in pipes]
+
+def train_pbt():
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    rng = random.Random(SEED)
+    ctx = mp.get_context("spawn")
+
+    hparams = [sample_hparams(rng, i) for i in range(POPULATION_SIZE)]
+    n_params = sum(p.numel() for p in build_model(hparams[0]).policy.parameters())
+    slots = [th.zeros(n_params).share_memory_() for _ in range(POPULATION_SIZE)]
+
+    pipes, procs = [], []
+    for i in range(POPULATION_SIZE):
+        parent_conn, child_conn = ctx.Pipe()
+        proc = ctx.Process(target=worker, args=(i, hparams[i], slots, child_conn), daemon=True)
+        proc.start()
+        pipes.append(parent_conn)
+        procs.append(proc)
+
+    print(f"--- STARTING PBT (Population: {POPULATION_SIZE}, Target: {TOTAL_TIMESTEPS} each) ---")
+    history = []
+    n_exploit = max(1, int(POPULATION_SIZE * EXPLOIT_FRACTION))
+    generation = 0
+    steps = 0
+    while steps < TOTAL_TIMESTEPS:
+        generation += 1
+        steps = max(broadcast(pipes, "train", INTERVAL_STEPS))
+
+        # Round robin: every member plays every other one, all in parallel
+        results = broadcast(pipes, "eval", SEED + generation * 100_000)
+        fitness = [sum(r["win_rate"] for r in res.values()) / len(res) for res in results]
+        ranking = sorted(range(POPULATION_SIZE), key=lambda i: fitness[i], reverse=True)
+
+        print(f"\n[Gen {generation} | {steps} steps]")
+        for i in ranking:
+            hp = hparams[i]
+            print(f"  member {i}: win {fitness[i]:.2f} | lr {hp['learning_rate']:.2e} "
+                  f"ent {hp['ent_coef']:.2e} gamma {hp['gamma']:.4f} | {hp['reward']}")
+        history.append({"generation": generation, "steps": steps, "fitness": fitness,
+                        "hparams": [dict(hp) for hp in hparams]})
+
+        # Exploit (copy a top member) + explore (perturb its hyperparameters).
+        # The reward variant is fixed per member, so all of them stay in play.
+        for weak in ranking[-n_exploit:]:
+            donor = rng.choice(ranking[:n_exploit])
+            hparams[weak] = perturb_hparams(rng, hparams[donor], hparams[weak]["reward"])
+            pipes[weak].send(("exploit", (donor, hparams[weak])))
+            pipes[weak].recv()
+            print(f"  member {weak} <- member {donor}")
+
+        best = ranking[0]
+        pipes[best].send(("save", f"{MODELS_DIR}/pbt_best"))
+        pipes[best].recv()
+        with open(f"{MODELS_DIR}/pbt_history.json", "w") as f:
+            json.dump(history, f, indent=2)
+
+    for i, conn in enumerate(pipes):
+        conn.send(("save", f"{MODELS_DIR}/pbt_member_{i}_final"))
+        conn.recv()
+    for conn in pipes:
+        conn.send(("stop", None))
+    for proc in procs:
+        proc.join()
+    print("Done.")
+
+if __name__ == "__main__":
+    train_pbt()